@@ -12,8 +12,26 @@ from .common import (
     NotConsumedError,
     UnexpectedTypeError,
 )
+from array import array
 from dataclasses import dataclass
-from typing import Dict, Iterable, Tuple, Union
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+import struct
+
+
+_TL = struct.Struct(">BI")
+_U1 = struct.Struct(">B")
+_U2 = struct.Struct(">H")
+_U4 = struct.Struct(">I")
+_U8 = struct.Struct(">Q")
+_UINTS = {1: _U1, 2: _U2, 4: _U4, 8: _U8}
 
 
 class CELBaseType(_EnumBase):
@@ -105,23 +123,24 @@ class CELIMATemplateType(_EnumBase):
     template_data = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class CELEvent:
     """Base class for CEL events
 
     Attributes:
       recnum (int): The event record number.
       handle (int): The handle for the PCR or NV index.
-      digests (dict): A dict of the digests.
+      digests (dict): A dict of the digests, keyed by the digest algorithm
+        value. Use alg_of to get the DigestAlgorithm of a key.
       content_type (CELContentType): The content type of the event.
     """
     recnum: int
     handle: int
-    digests: Dict[DigestAlgorithm, bytes]
+    digests: Dict[int, bytes]
     content_type: CELContentType
 
 
-@dataclass
+@dataclass(slots=True)
 class CELMgmtEvent(CELEvent):
     """Base class for CEL management events
 
@@ -136,7 +155,7 @@ class CELMgmtEvent(CELEvent):
     type: CELMgmtType
 
 
-@dataclass
+@dataclass(slots=True)
 class CELPCClientSTDEvent(CELEvent):
     """CEL PC Client event
 
@@ -153,7 +172,7 @@ class CELPCClientSTDEvent(CELEvent):
     event_data: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class CELIMATemplateEvent(CELEvent):
     """CEL IMA template event
 
@@ -170,7 +189,7 @@ class CELIMATemplateEvent(CELEvent):
     template_data: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class CELVersionEvent(CELMgmtEvent):
     """CEL version event
 
@@ -189,7 +208,7 @@ class CELVersionEvent(CELMgmtEvent):
     minor: int
 
 
-@dataclass
+@dataclass(slots=True)
 class CELFirmwareEndEvent(CELMgmtEvent):
     """CEL firmware end event
 
@@ -205,7 +224,7 @@ class CELFirmwareEndEvent(CELMgmtEvent):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CELTimestampEvent(CELMgmtEvent):
     """CEL timestamp event
 
@@ -222,7 +241,7 @@ class CELTimestampEvent(CELMgmtEvent):
     timestamp: int
 
 
-@dataclass
+@dataclass(slots=True)
 class CELStateTransEvent(CELMgmtEvent):
     """CEL firmware end event
 
@@ -239,41 +258,389 @@ class CELStateTransEvent(CELMgmtEvent):
     state_trans: StateTransType
 
 
+_VERSION_TYPES = (CELVersionType.major, CELVersionType.minor)
+_PCCLIENT_STD_TYPES = (
+    CELPCClientSTDType.event_type,
+    CELPCClientSTDType.event_data,
+)
+_IMA_TEMPLATE_TYPES = (
+    CELIMATemplateType.template_name,
+    CELIMATemplateType.template_data,
+)
+_RECNUM_EXPECT = (CELBaseType.recnum,)
+_HANDLE_EXPECT = (CELBaseType.pcr, CELBaseType.nv_index)
+_DIGESTS_EXPECT = (CELBaseType.digests,)
+_DIGEST_ALGS_EXPECT = tuple(DigestAlgorithm)
+_MGMT_TYPES_EXPECT = tuple(CELMgmtType)
+_CONTENT_TYPES_EXPECT = tuple(CELContentType)
+
+# The recnum, handle, digests and content_type of an event, in the order
+# of the CELEvent fields.
+_Header = Tuple[int, int, Dict[int, bytes], CELContentType]
+
+_DA_BY_VAL = {int(x): x for x in DigestAlgorithm}
+_MGMT_TYPE_BY_VAL = {int(x): x for x in CELMgmtType}
+_CONTENT_TYPE_BY_VAL = {int(x): x for x in CELContentType}
+_STATE_TRANS_BY_VAL = {int(x): x for x in StateTransType}
+_UEFI_EVENT_TYPE_BY_VAL = {int(x): x for x in UEFIEventType}
+
+
+def alg_of(code: int) -> DigestAlgorithm:
+    """Get the DigestAlgorithm for a digests key.
+
+    Raises:
+      KeyError: If code is not a known digest algorithm.
+    """
+    return _DA_BY_VAL[code]
+
+
+def _get_bytes(
+    buf: memoryview, off: int, end: int, size: int
+) -> Tuple[memoryview, int]:
+    """Get size amount of bytes from buf at off.
+
+    Returns:
+      A tuple of the bytes as a view into buf and the new offset.
+
+    Raises:
+      ShortBufferError: if size is larger then the number of bytes left.
+    """
+    if size > end - off:
+        raise ShortBufferError(off, size, end - off)
+    return buf[off:off+size], off + size
+
+
+def _check_size(
+    off: int, end: int, size: int, max_size: Optional[int] = None
+) -> None:
+    """Checks that size bytes are left at off.
+
+    Args:
+      max_size: The max number of bytes that represent a number, or None
+        if the value is not a number.
+
+    Raises:
+      ShortBufferError: If size is larger then the number of bytes left.
+      ValueError: If size is larger then max_size.
+    """
+    if max_size is not None and size > max_size:
+        raise ValueError(
+            f"requested int size {size} larger then {max_size}"
+        )
+    if size > end - off:
+        raise ShortBufferError(off, size, end - off)
+
+
+def _get_int(
+    buf: memoryview, off: int, end: int, size: int, max_size: int
+) -> Tuple[int, int]:
+    """Get a big endian int of size bytes from buf at off.
+
+    Returns:
+      A tuple of the number and the new offset.
+
+    Raises:
+      ShortBufferError: If size is larger then the number of bytes left.
+      ValueError: If size is larger then max_size.
+    """
+    if not size:
+        return 0, off
+    _check_size(off, end, size, max_size)
+    us = _UINTS.get(size)
+    if us is None:
+        return int.from_bytes(buf[off:off+size], byteorder="big"), off + size
+    (v,) = us.unpack_from(buf, off)
+    return v, off + size
+
+
+def _get_tl(
+    buf: memoryview, off: int, end: int, expect: Union[int, Iterable[int]]
+) -> Tuple[int, int, int]:
+    """Get the type and length from buf at off.
+
+    Returns:
+      A tuple of the type, the length and the new offset.
+
+    Raises:
+      ShortBufferError: If there isn't enough bytes left to consume.
+      UnexpectedTypeError: If the type is not in expect.
+    """
+    if end - off < 5:
+        raise ShortBufferError(off, 5, end - off)
+    t, vl = _TL.unpack_from(buf, off)
+    if isinstance(expect, int):
+        expect = (expect,)
+    if expect and t not in expect:
+        raise UnexpectedTypeError(t, expect)
+    return t, vl, off + 5
+
+
+def _get_tlv_int(
+    buf: memoryview,
+    off: int,
+    end: int,
+    max_size: int,
+    expect: Union[int, Iterable[int]],
+) -> Tuple[int, int, int]:
+    """Get an TLV encoded number from buf at off.
+
+    Returns:
+      A tuple of the type, the number and the new offset.
+    """
+    t, vl, off = _get_tl(buf, off, end, expect)
+    v, off = _get_int(buf, off, end, vl, max_size)
+    return t, v, off
+
+
+def _get_tl_pair(
+    buf: memoryview,
+    off: int,
+    end: int,
+    types: Tuple[_EnumBase, _EnumBase],
+    max_sizes: Tuple[Optional[int], Optional[int]] = (None, None),
+) -> Tuple[int, int, int, int, int]:
+    """Get the two TLVs of a structure made up of exactly the two types.
+
+    The TLVs may appear in any order, each type has to appear once.
+
+    Args:
+      types: The two CEL types.
+      max_sizes: The max number of bytes for the value of each type if it
+        represents a number, or None.
+
+    Returns:
+      A tuple of the offset and length of the value for the first type,
+      the offset and length of the value for the second type and the new
+      offset.
+
+    Raises:
+      ShortBufferError: If there isn't enough bytes left to consume.
+      UnexpectedTypeError: If a type is not expected.
+      ValueError: If a number is larger then its max size.
+    """
+    t, vl, off = _get_tl(buf, off, end, types)
+    first = 0 if t == types[0] else 1
+    _check_size(off, end, vl, max_sizes[first])
+    foff, fl = off, vl
+    off += vl
+    other = types[1 - first]
+    t, vl, off = _get_tl(buf, off, end, ())
+    if t != other:
+        raise UnexpectedTypeError(t, [other])
+    _check_size(off, end, vl, max_sizes[1 - first])
+    if first:
+        return off, vl, foff, fl, off + vl
+    return foff, fl, off, vl, off + vl
+
+
+def _get_digests_tl(
+    buf: memoryview, off: int, end: int
+) -> Tuple[int, int]:
+    """Get the type and length of the digests TLV at off.
+
+    Returns:
+      A tuple of the offset of the first digest and the end of the digests.
+
+    Raises:
+      ShortBufferError: If there isn't enough bytes left to consume.
+      UnexpectedTypeError: If the type is not the digests type.
+    """
+    _, vl, off = _get_tl(buf, off, end, _DIGESTS_EXPECT)
+    dend = off + vl
+    if dend > end:
+        raise ShortBufferError(off, vl, end - off)
+    return off, dend
+
+
+def _parse_digests(
+    buf: memoryview, off: int, end: int
+) -> Tuple[Dict[int, bytes], int]:
+    """Parses the digests TLV at off.
+
+    Raises:
+      ShortBufferError: If there isn't enough bytes left to consume.
+      UnexpectedTypeError: If any type or digest algorithm are unsupported.
+    """
+    off, dend = _get_digests_tl(buf, off, end)
+    digs = {}
+    unpack_tl = _TL.unpack_from
+    while off < dend:
+        if dend - off < 5:
+            raise ShortBufferError(off, 5, dend - off)
+        a, dl = unpack_tl(buf, off)
+        if a not in _DA_BY_VAL:
+            raise UnexpectedTypeError(a, _DIGEST_ALGS_EXPECT)
+        off += 5
+        if dl > dend - off:
+            raise ShortBufferError(off, dl, dend - off)
+        digs[a] = bytes(buf[off:off+dl]) if dl else b""
+        off += dl
+    return digs, off
+
+
+def _parse_mgmt_version(
+    buf: memoryview, off: int, end: int, header: _Header
+) -> CELVersionEvent:
+    """Parses a CEL version event spanning off to end."""
+    maoff, mal, mioff, mil, off = _get_tl_pair(
+        buf, off, end, _VERSION_TYPES, (2, 2)
+    )
+    if off < end:
+        raise NotConsumedError(end - off)
+    major = int.from_bytes(buf[maoff:maoff+mal], byteorder="big")
+    minor = int.from_bytes(buf[mioff:mioff+mil], byteorder="big")
+    return CELVersionEvent(
+        *header,
+        type=CELMgmtType.cel_version,
+        major=major,
+        minor=minor,
+    )
+
+
+def _parse_mgmt(
+    buf: memoryview, off: int, end: int, header: _Header
+) -> CELMgmtEvent:
+    """Parses CEL managment events spanning off to end."""
+    event: CELMgmtEvent
+    t, vl, off = _get_tl(buf, off, end, _MGMT_TYPES_EXPECT)
+    if t == CELMgmtType.cel_version:
+        if vl > end - off:
+            raise ShortBufferError(off, vl, end - off)
+        event = _parse_mgmt_version(buf, off, off + vl, header)
+    elif t == CELMgmtType.firmware_end:
+        event = CELFirmwareEndEvent(
+            *header,
+            type=_MGMT_TYPE_BY_VAL[t],
+        )
+    elif t == CELMgmtType.cel_timestamp:
+        timestamp, off = _get_int(buf, off, end, vl, 8)
+        event = CELTimestampEvent(
+            *header,
+            type=_MGMT_TYPE_BY_VAL[t],
+            timestamp=timestamp,
+        )
+    elif t == CELMgmtType.state_trans:
+        st, off = _get_int(buf, off, end, vl, 1)
+        state_trans = _STATE_TRANS_BY_VAL.get(st)
+        if state_trans is None:
+            state_trans = StateTransType(st)
+        event = CELStateTransEvent(
+            *header,
+            type=_MGMT_TYPE_BY_VAL[t],
+            state_trans=state_trans,
+        )
+    return event
+
+
+def _parse_pcclient_std(
+    buf: memoryview, off: int, end: int, header: _Header
+) -> CELPCClientSTDEvent:
+    """Parses a PC Client event spanning off to end."""
+    etoff, etl, edoff, edl, off = _get_tl_pair(
+        buf, off, end, _PCCLIENT_STD_TYPES, (4, None)
+    )
+    if off < end:
+        raise NotConsumedError(end - off)
+    event_type = int.from_bytes(buf[etoff:etoff+etl], byteorder="big")
+    event_data = bytes(buf[edoff:edoff+edl])
+    uefi_event_type = _UEFI_EVENT_TYPE_BY_VAL.get(event_type)
+    if uefi_event_type is None:
+        uefi_event_type = UEFIEventType(event_type)
+    return CELPCClientSTDEvent(
+        *header,
+        event_type=uefi_event_type,
+        event_data=event_data,
+    )
+
+
+def _parse_ima_template(
+    buf: memoryview, off: int, end: int, header: _Header
+) -> CELIMATemplateEvent:
+    """Parses a IMA template event spanning off to end."""
+    tnoff, tnl, tdoff, tdl, off = _get_tl_pair(
+        buf, off, end, _IMA_TEMPLATE_TYPES
+    )
+    if off < end:
+        raise NotConsumedError(end - off)
+    template_name = bytes(buf[tnoff:tnoff+tnl])
+    template_data = bytes(buf[tdoff:tdoff+tdl])
+    return CELIMATemplateEvent(
+        *header,
+        template_name=template_name,
+        template_data=template_data,
+    )
+
+
+def _parse_event(
+    buf: memoryview, off: int, end: int
+) -> Tuple[CELEvent, int]:
+    """Parses an event at off.
+
+    Raises:
+      ShortBufferError: If the buffer too small.
+      UnexpectedTypeError: If there is any unexpected type.
+
+    Returns:
+      A tuple of a subclass of CELEvent and the new offset.
+    """
+    event: CELEvent
+    _, recnum, off = _get_tlv_int(buf, off, end, 8, _RECNUM_EXPECT)
+    _, handle, off = _get_tlv_int(buf, off, end, 4, _HANDLE_EXPECT)
+    digests, off = _parse_digests(buf, off, end)
+    ct, cl, off = _get_tl(buf, off, end, _CONTENT_TYPES_EXPECT)
+    if cl > end - off:
+        raise ShortBufferError(off, cl, end - off)
+    content_type = _CONTENT_TYPE_BY_VAL[ct]
+    header = (recnum, handle, digests, content_type)
+    cend = off + cl
+    if content_type == CELContentType.cel:
+        event = _parse_mgmt(buf, off, cend, header)
+    elif content_type == CELContentType.pcclient_std:
+        event = _parse_pcclient_std(buf, off, cend, header)
+    elif content_type == CELContentType.ima_template:
+        event = _parse_ima_template(buf, off, cend, header)
+    return event, cend
+
+
 class TLVParser:
     """CEL TLV Parser
 
     Parses TLV encoded events.
 
     Args:
-      data (bytes): The data to be parsed.
+      data (bytes): The data to be parsed, wrapped in a memoryview so
+        parsing does not copy it.
     """
-    def __init__(self, data: bytes):
-        self._data = data
+    def __init__(self, data: Union[bytes, memoryview]):
+        self._data = memoryview(data)
+        self._end = len(self._data)
         self._offset = 0
 
     @property
     def left(self) -> int:
         """left (int): The number of unparsed bytes."""
-        return len(self._data) - self._offset
+        return self._end - self._offset
 
     @property
     def offset(self) -> int:
         """offset (int): The current offet into the data."""
         return self._offset
 
-    def get_bytes(self, size: int) -> bytes:
+    def get_bytes(self, size: int) -> memoryview:
         """Get size amount of bytes from the data updating the offset.
 
+        The bytes are returned as a view into the data, use bytes() on the
+        result if it needs to outlive the parser.
+
         Args:
           size (int): The number of bytes to get.
 
         Raises:
           ShortBufferError: if size is larger then the number of bytes left.
         """
-        if size > self.left:
-            raise ShortBufferError(self.offset, size, self.left)
-        b = self._data[self.offset:self.offset+size]
-        self._offset += len(b)
+        b, self._offset = _get_bytes(
+            self._data, self._offset, self._end, size
+        )
         return b
 
     def get_int(self, size: int, max_size: int) -> int:
@@ -287,12 +654,10 @@ class TLVParser:
           ShortBufferError: If size is larger then the number of bytes left.
           ValueError: If size is larger then max_size.
         """
-        if size > max_size:
-            raise ValueError(
-                f"requested int size {size} larger then {max_size}"
-            )
-        ib = self.get_bytes(size)
-        return int.from_bytes(ib, byteorder="big")
+        v, self._offset = _get_int(
+            self._data, self._offset, self._end, size, max_size
+        )
+        return v
 
     def get_tl(self, expect: Union[int, Iterable[int]]) -> Tuple[int, int]:
         """Get the type and length.
@@ -304,13 +669,9 @@ class TLVParser:
           ShortBufferError: If there isn't enough bytes left to consume.
           UnexpectedTypeError: If the type is not in expect.
         """
-        b = self.get_bytes(5)
-        t = int(b[0])
-        if isinstance(expect, int):
-            expect = (expect,)
-        if expect and t not in expect:
-            raise UnexpectedTypeError(t, expect)
-        vl = int.from_bytes(b[1:5], byteorder="big")
+        t, vl, self._offset = _get_tl(
+            self._data, self._offset, self._end, expect
+        )
         return t, vl
 
     def get_tlv_int(
@@ -327,174 +688,195 @@ class TLVParser:
           UnexpectedTypeError: If the type is not in expect.
           ValueError: If the number bytes is larger then max_size.
         """
-        t, vl = self.get_tl(expect)
-        v = self.get_int(vl, max_size)
+        t, v, self._offset = _get_tlv_int(
+            self._data, self._offset, self._end, max_size, expect
+        )
         return t, v
 
-    def get_subparser(self, size: int) -> "TLVParser":
-        subdata = self.get_bytes(size)
-        return type(self)(subdata)
-
-    def get_digests(self) -> Dict[DigestAlgorithm, bytes]:
+    def get_digests(self) -> Dict[int, bytes]:
         """Get a list of digests.
 
         Raises:
           ShortBufferError: If there isn't enough bytes left to consume.
           UnexpectedTypeError: If any type or digest algorithm are unsupported.
         """
-        _, vl = self.get_tl(expect=CELBaseType.digests)
-        subparser = self.get_subparser(vl)
-        digs = {}
-        while subparser.left:
-            a, vl = subparser.get_tl(expect=tuple(DigestAlgorithm))
-            dig = subparser.get_bytes(vl)
-            da = DigestAlgorithm(a)
-            digs[da] = dig
+        digs, self._offset = _parse_digests(
+            self._data, self._offset, self._end
+        )
         return digs
 
-    def parse_mgmt_version_event(self, header: CELEvent) -> CELVersionEvent:
-        """Parses a CEL version event."""
-        left = list(CELVersionType)
-        major = -1
-        minor = -1
-        while left:
-            t, v = self.get_tlv_int(2, left)
-            t = CELVersionType(t)
-            left.remove(t)
-            if t == CELVersionType.major:
-                major = v
-            elif t == CELVersionType.minor:
-                minor = v
-        if self.left:
-            raise NotConsumedError(self.left)
-        return CELVersionEvent(
-            recnum=header.recnum,
-            handle=header.handle,
-            digests=header.digests,
-            content_type=header.content_type,
-            type=CELMgmtType(CELMgmtType.cel_version),
-            major=major,
-            minor=minor,
-        )
+    def parse_event(self) -> CELEvent:
+        """Parses an event.
 
-    def parse_mgmt_event(self, header: CELEvent) -> CELMgmtEvent:
-        """Parses CEL managment events."""
-        event: CELMgmtEvent
-        t, vl = self.get_tl(expect=tuple(CELMgmtType))
-        if t == CELMgmtType.cel_version:
-            subparser = self.get_subparser(vl)
-            event = subparser.parse_mgmt_version_event(header)
-        elif t == CELMgmtType.firmware_end:
-            event = CELFirmwareEndEvent(
-                recnum=header.recnum,
-                handle=header.handle,
-                digests=header.digests,
-                content_type=header.content_type,
-                type=CELMgmtType(t),
-            )
-        elif t == CELMgmtType.cel_timestamp:
-            timestamp = self.get_int(vl, 8)
-            event = CELTimestampEvent(
-                recnum=header.recnum,
-                handle=header.handle,
-                digests=header.digests,
-                content_type=header.content_type,
-                type=CELMgmtType(t),
-                timestamp=timestamp,
-            )
-        elif t == CELMgmtType.state_trans:
-            state_trans = self.get_int(vl, 1)
-            event = CELStateTransEvent(
-                recnum=header.recnum,
-                handle=header.handle,
-                digests=header.digests,
-                content_type=header.content_type,
-                type=CELMgmtType(t),
-                state_trans=StateTransType(state_trans),
-            )
-        return event
+        Raises:
+          ShortBufferError: If the buffer too small.
+          UnexpectedTypeError: If there is any unexpected type.
 
-    def parse_pcclient_std_event(
-        self, header: CELEvent
-    ) -> CELPCClientSTDEvent:
-        """Parses a PC Client event."""
-        left = list(CELPCClientSTDType)
-        event_type = -1
-        event_data = b""
-        while left:
-            t, vl = self.get_tl(left)
-            t = CELPCClientSTDType(t)
-            left.remove(t)
-            if t == CELPCClientSTDType.event_type:
-                event_type = self.get_int(vl, 4)
-            elif t == CELPCClientSTDType.event_data:
-                event_data = self.get_bytes(vl)
-        if self.left:
-            raise NotConsumedError(self.left)
-        return CELPCClientSTDEvent(
-            recnum=header.recnum,
-            handle=header.handle,
-            digests=header.digests,
-            content_type=header.content_type,
-            event_type=UEFIEventType(event_type),
-            event_data=event_data,
+        Returns:
+          A subclass of CELEvent
+        """
+        event, self._offset = _parse_event(
+            self._data, self._offset, self._end
         )
+        return event
 
-    def parse_ima_template_event(
-        self, header: CELEvent
-    ) -> CELIMATemplateEvent:
-        """Parses a IMA template event."""
-        left = list(CELIMATemplateType)
-        template_name = b""
-        template_data = b""
-        while left:
-            t, vl = self.get_tl(left)
-            t = CELIMATemplateType(t)
-            left.remove(t)
-            if t == CELIMATemplateType.template_name:
-                template_name = self.get_bytes(vl)
-            elif t == CELIMATemplateType.template_data:
-                template_data = self.get_bytes(vl)
-        if self.left:
-            raise NotConsumedError(self.left)
-        return CELIMATemplateEvent(
-            recnum=header.recnum,
-            handle=header.handle,
-            digests=header.digests,
-            content_type=header.content_type,
-            template_name=template_name,
-            template_data=template_data,
-        )
 
-    def parse_event(self) -> CELEvent:
-        """Parses an event.
+def iter_events(data: Union[bytes, memoryview]) -> Iterator[CELEvent]:
+    """Iterates over all TLV encoded events in data.
+
+    Args:
+      data (bytes): The event log to be parsed.
+
+    Raises:
+      ShortBufferError: If the buffer too small.
+      UnexpectedTypeError: If there is any unexpected type.
+
+    Yields:
+      A subclass of CELEvent for each event in the log.
+    """
+    buf = memoryview(data)
+    off = 0
+    end = len(buf)
+    while off < end:
+        event, off = _parse_event(buf, off, end)
+        yield event
+
+
+class CELEventBatch:
+    """Columnar view of a CEL TLV encoded event log.
+
+    Only the event headers are parsed up front, each into one entry of the
+    column arrays, the content of the events is validated and turned into
+    CELEvent subclasses only when requested via event() or to_events().
+
+    Args:
+      data (bytes): The event log to be parsed.
+
+    Raises:
+      ShortBufferError: If the buffer too small.
+      UnexpectedTypeError: If there is any unexpected type in the headers.
+
+    Attributes:
+      recnum (array): The event record numbers.
+      handle (array): The handles for the PCRs or NV indexes.
+      content_type (array): The content types of the events.
+    """
+    def __init__(self, data: Union[bytes, memoryview]):
+        self._data = memoryview(data)
+        self.recnum = array("Q")
+        self.handle = array("L")
+        self.content_type = array("B")
+        self._starts = array("Q")
+        self._digests: Dict[int, Tuple[array, array]] = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        buf = self._data
+        off = 0
+        end = len(buf)
+        n = 0
+        digests = self._digests
+        unpack_tl = _TL.unpack_from
+        while off < end:
+            start = off
+            _, recnum, off = _get_tlv_int(buf, off, end, 8, _RECNUM_EXPECT)
+            _, handle, off = _get_tlv_int(buf, off, end, 4, _HANDLE_EXPECT)
+            off, dend = _get_digests_tl(buf, off, end)
+            while off < dend:
+                if dend - off < 5:
+                    raise ShortBufferError(off, 5, dend - off)
+                a, dl = unpack_tl(buf, off)
+                if a not in _DA_BY_VAL:
+                    raise UnexpectedTypeError(a, _DIGEST_ALGS_EXPECT)
+                off += 5
+                if dl > dend - off:
+                    raise ShortBufferError(off, dl, dend - off)
+                columns = digests.get(a)
+                if columns is None:
+                    # earlier events have no digest of this algorithm
+                    columns = digests[a] = (
+                        array("q", [-1]) * n,
+                        array("L", [0]) * n,
+                    )
+                offs, lens = columns
+                if len(offs) == n:
+                    offs.append(off)
+                    lens.append(dl)
+                else:
+                    offs[n] = off
+                    lens[n] = dl
+                off += dl
+            for offs, lens in digests.values():
+                if len(offs) == n:
+                    offs.append(-1)
+                    lens.append(0)
+            ct, cl, off = _get_tl(buf, off, end, _CONTENT_TYPES_EXPECT)
+            if cl > end - off:
+                raise ShortBufferError(off, cl, end - off)
+            off += cl
+            self.recnum.append(recnum)
+            self.handle.append(handle)
+            self.content_type.append(ct)
+            self._starts.append(start)
+            n += 1
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def filter(
+        self,
+        content_type: Optional[CELContentType] = None,
+        handle: Optional[int] = None,
+    ) -> List[int]:
+        """Get the indexes of the events matching all given values.
+
+        Args:
+          content_type (CELContentType): Only match events of this type.
+          handle (int): Only match events for this PCR or NV index.
+        """
+        indexes = range(len(self))
+        if content_type is not None:
+            cts = self.content_type
+            indexes = [i for i in indexes if cts[i] == content_type]
+        if handle is not None:
+            handles = self.handle
+            indexes = [i for i in indexes if handles[i] == handle]
+        return list(indexes)
+
+    def digest(self, alg: DigestAlgorithm) -> List[Optional[bytes]]:
+        """Get the digest of alg for every event.
+
+        Args:
+          alg (DigestAlgorithm): The digest algorithm.
+
+        Returns:
+          A list with the digest of each event, or None for events without
+          a digest for alg.
+        """
+        buf = self._data
+        offs, lens = self._digests.get(alg, ((), ()))
+        if not offs:
+            return [None] * len(self)
+        return [
+            bytes(buf[o:o+dl]) if o >= 0 else None
+            for o, dl in zip(offs, lens)
+        ]
+
+    def event(self, index: int) -> CELEvent:
+        """Parses the event at index.
 
         Raises:
           ShortBufferError: If the buffer too small.
           UnexpectedTypeError: If there is any unexpected type.
+          IndexError: If index is out of range.
 
         Returns:
           A subclass of CELEvent
         """
-        event: CELEvent
-        _, recnum = self.get_tlv_int(8, CELBaseType.recnum)
-        _, handle = self.get_tlv_int(
-            4, (CELBaseType.pcr, CELBaseType.nv_index)
-        )
-        digests = self.get_digests()
-        ct, cl = self.get_tl(tuple(CELContentType))
-        content_type = CELContentType(ct)
-        header = CELEvent(
-            recnum=recnum,
-            handle=handle,
-            digests=digests,
-            content_type=content_type,
-        )
-        subparser = self.get_subparser(cl)
-        if content_type == CELContentType.cel:
-            event = subparser.parse_mgmt_event(header)
-        elif content_type == CELContentType.pcclient_std:
-            event = subparser.parse_pcclient_std_event(header)
-        elif content_type == CELContentType.ima_template:
-            event = subparser.parse_ima_template_event(header)
+        buf = self._data
+        event, _ = _parse_event(buf, self._starts[index], len(buf))
         return event
+
+    def to_events(self) -> List[CELEvent]:
+        """Parses all events, see event()."""
+        return [self.event(i) for i in range(len(self))]
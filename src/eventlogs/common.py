@@ -7,7 +7,7 @@ from typing import Iterable, Union
 class _EnumBase(IntEnum):
     """Simple class to override default Enum __str__"""
     def __str__(self) -> str:
-        return f"{self.name}"
+        return self.name
 
 
 class DigestAlgorithm(_EnumBase):
@@ -109,5 +109,5 @@ class UnexpectedTypeError(Exception):
         return self._expected
 
     def __str__(self) -> str:
-        estr = ", ".join([str(x) for x in self.expected])
+        estr = ", ".join(str(x) for x in self.expected)
         return f"unexpected type {self.got}, expected one of: {estr}"
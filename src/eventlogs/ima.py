@@ -10,9 +10,19 @@ from .common import (
     NotConsumedError,
     UnexpectedTypeError,
 )
+from array import array
 from dataclasses import dataclass
 from enum import Enum
-from typing import Tuple, Dict, List, Literal
+from typing import Callable, Tuple, Dict, List, Literal
+import struct
+import sys
+
+
+_U32 = {
+    "little": struct.Struct("<I"),
+    "big": struct.Struct(">I"),
+}
+_U32_TYPECODE = "I" if array("I").itemsize == 4 else "L"
 
 
 class IMATemplateField(Enum):
@@ -68,250 +78,242 @@ class IMATemplateDescriptor:
 
     @classmethod
     def expand(cls, descriptor: bytes) -> Tuple[IMATemplateField, ...]:
-        if descriptor == b"ima":
-            return cls.ima
-        elif descriptor == b"ima-ng":
-            return cls.ima_ng
-        elif descriptor == b"ima-ngv2":
-            return cls.ima_ngv2
-        elif descriptor == b"ima-sig":
-            return cls.ima_sig
-        elif descriptor == b"ima-sigv2":
-            return cls.ima_sigv2
-        elif descriptor == b"ima-buf":
-            return cls.ima_buf
-        elif descriptor == b"ima-modsig":
-            return cls.ima_modsig
-        elif descriptor == b"evm-sig":
-            return cls.evm_sig
-        raise UnexpectedTypeError(
-            got=descriptor.decode("ascii"),
-            expected=(
-                "ima",
-                "ima-ng",
-                "ima-ngv2",
-                "ima-sig",
-                "ima-sigv2",
-                "ima-buf",
-                "ima-modsig",
-                "evm-sig",
+        field_types = _DESCRIPTORS.get(descriptor)
+        if field_types is None:
+            raise UnexpectedTypeError(
+                got=descriptor.decode("ascii"),
+                expected=tuple(d.decode("ascii") for d in _DESCRIPTORS),
             )
-        )
+        return field_types
+
+
+_DESCRIPTORS: Dict[bytes, Tuple[IMATemplateField, ...]] = {
+    b"ima": IMATemplateDescriptor.ima,
+    b"ima-ng": IMATemplateDescriptor.ima_ng,
+    b"ima-ngv2": IMATemplateDescriptor.ima_ngv2,
+    b"ima-sig": IMATemplateDescriptor.ima_sig,
+    b"ima-sigv2": IMATemplateDescriptor.ima_sigv2,
+    b"ima-buf": IMATemplateDescriptor.ima_buf,
+    b"ima-modsig": IMATemplateDescriptor.ima_modsig,
+    b"evm-sig": IMATemplateDescriptor.evm_sig,
+}
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAField:
     field: IMATemplateField
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldD(IMAField):
-    field = IMATemplateField.d
     digest: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldN(IMAField):
-    field = IMATemplateField.n
     name: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldD_NG(IMAField):
-    field = IMATemplateField.d_ng
     algorithm: bytes
     digest: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldD_NGv2(IMAField):
-    field = IMATemplateField.d_ngv2
     type: bytes
     algorithm: bytes
     digest: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldD_ModSig(IMAField):
-    field = IMATemplateField.d_modsig
     digest: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldN_NG(IMAField):
-    field = IMATemplateField.n_ng
     name: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldSig(IMAField):
-    field = IMATemplateField.sig
     signature: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldModSig(IMAField):
-    field = IMATemplateField.modsig
     signature: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldBuf(IMAField):
-    field = IMATemplateField.buf
     buffer: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldEVMSig(IMAField):
-    field = IMATemplateField.evmsig
     signature: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldIUID(IMAField):
-    field = IMATemplateField.iuid
     iuid: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldIGID(IMAField):
-    field = IMATemplateField.igid
     igid: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldIMode(IMAField):
-    field = IMATemplateField.imode
     imode: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldXattrNames(IMAField):
-    field = IMATemplateField.xattrnames
     names: Tuple[bytes, ...]
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldXattrLengths(IMAField):
-    field = IMATemplateField.xattrlengths
-    lengths: Tuple[int, ...]
+    lengths: array
 
 
-@dataclass
+@dataclass(slots=True)
 class IMAFieldXattrValues(IMAField):
-    field = IMATemplateField.xattrvalues
     values: Tuple[bytes, ...]
 
 
-@dataclass
+@dataclass(slots=True)
 class IMATemplateEvent:
     pcr: int
     fields: Tuple[IMAField, ...]
     digests: Dict[DigestAlgorithm, bytes]
 
 
+def _parse_d_ng(fv: bytes, byteorder: str) -> IMAFieldD_NG:
+    ab, db = fv.split(b":", 1)
+    return IMAFieldD_NG(IMATemplateField.d_ng, ab, db)
+
+
+def _parse_d_ngv2(fv: bytes, byteorder: str) -> IMAFieldD_NGv2:
+    sb, ab, db = fv.split(b":", 2)
+    return IMAFieldD_NGv2(IMATemplateField.d_ngv2, sb, ab, db)
+
+
+def _parse_xattrlengths(fv: bytes, byteorder: str) -> IMAFieldXattrLengths:
+    extra = len(fv) % 4
+    if extra:
+        raise ShortBufferError(len(fv) - extra, 4, extra)
+    lens = array(_U32_TYPECODE, fv)
+    if byteorder != sys.byteorder:
+        lens.byteswap()
+    return IMAFieldXattrLengths(IMATemplateField.xattrlengths, lens)
+
+
+def _parse_xattrvalues(fv: bytes, byteorder: str) -> IMAFieldXattrValues:
+    # FIXME, figure out how to parse this
+    raise NotImplementedError
+
+
+_FIELD_HANDLERS: Dict[IMATemplateField, Callable[[bytes, str], IMAField]] = {
+    IMATemplateField.d: lambda fv, bo: IMAFieldD(IMATemplateField.d, fv),
+    IMATemplateField.n: lambda fv, bo: IMAFieldN(IMATemplateField.n, fv),
+    IMATemplateField.d_ng: _parse_d_ng,
+    IMATemplateField.d_ngv2: _parse_d_ngv2,
+    IMATemplateField.d_modsig: lambda fv, bo: IMAFieldD_ModSig(
+        IMATemplateField.d_modsig, fv
+    ),
+    IMATemplateField.n_ng: lambda fv, bo: IMAFieldN_NG(
+        IMATemplateField.n_ng, fv
+    ),
+    IMATemplateField.sig: lambda fv, bo: IMAFieldSig(IMATemplateField.sig, fv),
+    IMATemplateField.modsig: lambda fv, bo: IMAFieldModSig(
+        IMATemplateField.modsig, fv
+    ),
+    IMATemplateField.buf: lambda fv, bo: IMAFieldBuf(IMATemplateField.buf, fv),
+    IMATemplateField.evmsig: lambda fv, bo: IMAFieldEVMSig(
+        IMATemplateField.evmsig, fv
+    ),
+    IMATemplateField.iuid: lambda fv, bo: IMAFieldIUID(
+        IMATemplateField.iuid, int.from_bytes(fv, byteorder=bo)
+    ),
+    IMATemplateField.igid: lambda fv, bo: IMAFieldIGID(
+        IMATemplateField.igid, int.from_bytes(fv, byteorder=bo)
+    ),
+    IMATemplateField.imode: lambda fv, bo: IMAFieldIMode(
+        IMATemplateField.imode, int.from_bytes(fv, byteorder=bo)
+    ),
+    IMATemplateField.xattrnames: lambda fv, bo: IMAFieldXattrNames(
+        IMATemplateField.xattrnames, tuple(fv.split(b"|"))
+    ),
+    IMATemplateField.xattrlengths: _parse_xattrlengths,
+    IMATemplateField.xattrvalues: _parse_xattrvalues,
+}
+
+
 class IMAParser:
     def __init__(
         self, data: bytes, byteorder: Literal["little", "big"] = "little"
     ):
-        self._data = data
+        self._data = memoryview(data)
+        self._end = len(self._data)
         self._offset = 0
         self._byteorder = byteorder
+        self._u32 = _U32[byteorder]
 
     @property
     def left(self) -> int:
-        return len(self._data) - self.offset
+        return self._end - self._offset
 
     @property
     def offset(self) -> int:
         return self._offset
 
-    def get_bytes(self, size: int) -> bytes:
-        if size > self.left:
-            raise ShortBufferError(self.offset, size, self.left)
-        b = self._data[self.offset:self.offset + size]
-        self._offset += size
-        return b
+    def get_bytes(self, size: int) -> memoryview:
+        off = self._offset
+        new = off + size
+        if new > self._end:
+            raise ShortBufferError(off, size, self._end - off)
+        self._offset = new
+        return self._data[off:new]
 
     def get_uint32(self) -> int:
-        b = self.get_bytes(4)
-        return int.from_bytes(b, byteorder=self._byteorder)
-
-    def get_len_bytes(self) -> bytes:
+        off = self._offset
+        if off + 4 > self._end:
+            raise ShortBufferError(off, 4, self._end - off)
+        (v,) = self._u32.unpack_from(self._data, off)
+        self._offset = off + 4
+        return v
+
+    def get_len_bytes(self) -> memoryview:
         cl = self.get_uint32()
         b = self.get_bytes(cl)
         return b
 
-    def get_subparser(self, data: bytes) -> "IMAParser":
+    def get_subparser(self, data: memoryview) -> "IMAParser":
         return type(self)(data=data, byteorder=self._byteorder)
 
     def parse_field(self, field_type: IMATemplateField) -> IMAField:
-        field: IMAField
-        fv = self.get_len_bytes()
-        if field_type == IMATemplateField.d:
-            field = IMAFieldD(field=field_type, digest=fv)
-        elif field_type == IMATemplateField.n:
-            field = IMAFieldN(field=field_type, name=fv)
-        elif field_type == IMATemplateField.d_ng:
-            ab, db = fv.split(b":", 1)
-            field = IMAFieldD_NG(field=field_type, algorithm=ab, digest=db)
-        elif field_type == IMATemplateField.d_ngv2:
-            sb, ab, db = fv.split(b":", 2)
-            field = IMAFieldD_NGv2(
-                field=field_type, type=sb, algorithm=ab, digest=db
-            )
-        elif field_type == IMATemplateField.d_modsig:
-            field = IMAFieldD_ModSig(field=field_type, digest=fv)
-        elif field_type == IMATemplateField.n_ng:
-            field = IMAFieldN_NG(field=field_type, name=fv)
-        elif field_type == IMATemplateField.sig:
-            field = IMAFieldSig(field=field_type, signature=fv)
-        elif field_type == IMATemplateField.modsig:
-            field = IMAFieldModSig(field=field_type, signature=fv)
-        elif field_type == IMATemplateField.buf:
-            field = IMAFieldBuf(field=field_type, buffer=fv)
-        elif field_type == IMATemplateField.evmsig:
-            field = IMAFieldEVMSig(field=field_type, signature=fv)
-        elif field_type == IMATemplateField.iuid:
-            iuid = int.from_bytes(fv, byteorder=self._byteorder)
-            field = IMAFieldIUID(field=field_type, iuid=iuid)
-        elif field_type == IMATemplateField.igid:
-            igid = int.from_bytes(fv, byteorder=self._byteorder)
-            field = IMAFieldIGID(field=field_type, igid=igid)
-        elif field_type == IMATemplateField.imode:
-            imode = int.from_bytes(fv, byteorder=self._byteorder)
-            field = IMAFieldIMode(field=field_type, imode=imode)
-        elif field_type == IMATemplateField.xattrnames:
-            xnames = fv.split(b"|")
-            field = IMAFieldXattrNames(field=field_type, names=tuple(xnames))
-        elif field_type == IMATemplateField.xattrlengths:
-            subparser = self.get_subparser(fv)
-            lens = list()
-            while subparser.left:
-                xl = subparser.get_uint32()
-                lens.append(xl)
-            field = IMAFieldXattrLengths(field=field_type, lengths=tuple(lens))
-        elif field_type == IMATemplateField.xattrvalues:
-            # FIXME, figure out how to parse this
-            raise NotImplementedError
-        return field
+        fv = bytes(self.get_len_bytes())
+        return _FIELD_HANDLERS[field_type](fv, self._byteorder)
 
     def parse_fields(
         self, field_types: Tuple[IMATemplateField, ...]
     ) -> List[IMAField]:
-        fields = list()
-        for ft in field_types:
-            field = self.parse_field(ft)
-            fields.append(field)
-        return fields
+        parse_field = self.parse_field
+        return [parse_field(ft) for ft in field_types]
 
     def parse_event(self) -> IMATemplateEvent:
         pcr = self.get_uint32()
-        dig = self.get_bytes(20)
+        dig = bytes(self.get_bytes(20))
         digests = {
             DigestAlgorithm.sha1: dig
         }
-        descriptor = self.get_len_bytes()
+        descriptor = bytes(self.get_len_bytes())
         field_types = IMATemplateDescriptor.expand(descriptor)
         subdata = self.get_len_bytes()
         subparser = self.get_subparser(subdata)
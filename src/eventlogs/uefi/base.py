@@ -6,14 +6,46 @@ This module implements UEFI structures and encodings.
 
 from ..common import DigestAlgorithm, UEFIEventType
 from dataclasses import dataclass
-from typing import Dict, Optional, Type, Union, Tuple
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Type,
+    Union,
+    Tuple,
+)
 from uuid import UUID
-
-
-@dataclass
+import re
+import struct
+
+
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_UINTS = {1: _U8, 2: _U16, 4: _U32, 8: _U64}
+# the fixed start of the Spec ID event and its algorithm ID and size pairs
+_SPECID_HEADER = struct.Struct("<16sIBBBBI")
+_SPECID_ALG = struct.Struct("<HH")
+_EVENT_PCR_TYPE = struct.Struct("<II")
+# the guid, name length and data length leading variable events
+_VARIABLE_HEADER = struct.Struct("<16sQQ")
+_ALG_BY_ID = {int(a): a for a in DigestAlgorithm}
+_EVT_BY_ID = {int(e): e for e in UEFIEventType}
+# a run of UTF-16 code units up to and including the first NUL code unit
+_UTF16_STRING = re.compile(b"(?:..)*?\x00\x00", re.DOTALL)
+
+
+@dataclass(slots=True)
 class UEFIEvent:
     pcr: int
-    event_type: UEFIEventType
+    # unknown event types are kept as plain ints
+    event_type: Union[UEFIEventType, int]
     digests: Dict[DigestAlgorithm, bytes]
 
     @classmethod
@@ -21,7 +53,7 @@ class UEFIEvent:
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIUnknownEvent(UEFIEvent):
     event_data: bytes
 
@@ -29,33 +61,28 @@ class UEFIUnknownEvent(UEFIEvent):
     def parse(
         cls, parser: "UEFIParser", header: UEFIEvent
     ) -> "UEFIUnknownEvent":
-        event_data = parser.get_bytes(parser.left)
-        return cls(
-            pcr=header.pcr,
-            event_type=header.event_type,
-            digests=header.digests,
-            event_data=event_data
-        )
+        event_data = bytes(parser.get_bytes(parser.left))
+        return cls(header.pcr, header.event_type, header.digests, event_data)
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIVariable:
     @classmethod
     def parse(cls, parser: "UEFIParser") -> "UEFIVariable":
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIUnknownVariable(UEFIVariable):
     data: bytes
 
     @classmethod
     def parse(cls, parser: "UEFIParser") -> "UEFIUnknownVariable":
-        data = parser.get_bytes(parser.left)
+        data = bytes(parser.get_bytes(parser.left))
         return cls(data=data)
 
 
-@dataclass
+@dataclass(slots=True)
 class SpecIDEvent(UEFIEvent):
     signature: bytes
     platform_class: int
@@ -67,7 +94,10 @@ class SpecIDEvent(UEFIEvent):
     vendor_info_size: int
 
 
-_event_handlers = dict()
+# handlers for an event type on any PCR, keyed by event type, and handlers
+# for an event type on one PCR, keyed by event type << 32 | pcr
+_event_handlers: Dict[int, Type[UEFIEvent]] = dict()
+_pcr_event_handlers: Dict[int, Type[UEFIEvent]] = dict()
 
 
 def register_event_handler(
@@ -75,25 +105,57 @@ def register_event_handler(
     handler: Type[UEFIEvent],
     pcr: Optional[int] = None,
 ) -> None:
-    key: Union[UEFIEventType, Tuple[UEFIEventType, int]]
-    key = event_type
-    if pcr is not None:
-        key = (event_type, pcr)
-    _event_handlers[key] = handler
+    register_event_handlers({(event_type, pcr): handler})
+
+
+def register_event_handlers(
+    handlers: Mapping[Tuple[UEFIEventType, Optional[int]], Type[UEFIEvent]],
+) -> None:
+    """Register a table of handlers at once.
+
+    Args:
+      handlers: Handlers keyed by event type and PCR, a PCR of None
+        registers the handler for the event type on any PCR.
+    """
+    for (event_type, pcr), handler in handlers.items():
+        if pcr is None:
+            _event_handlers[int(event_type)] = handler
+        else:
+            _pcr_event_handlers[int(event_type) << 32 | pcr] = handler
+    _resolve_event_handler.cache_clear()
+    _resolve_event_parse.cache_clear()
+
+
+@lru_cache(maxsize=1024)
+def _resolve_event_handler(key: int) -> Type[UEFIEvent]:
+    # key is event type << 32 | pcr, resolved once per pair to the PCR
+    # specific handler, the event type handler or the unknown event
+    handler = _pcr_event_handlers.get(key)
+    if handler is not None:
+        return handler
+    return _event_handlers.get(key >> 32, UEFIUnknownEvent)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_event_parse(
+    key: int,
+) -> Callable[["UEFIParser", UEFIEvent], UEFIEvent]:
+    # the bound parse classmethod, saving the attribute lookup per event
+    return _resolve_event_handler(key).parse
 
 
 def lookup_event_handler(
-    event_type: UEFIEventType, pcr: int
+    event_type: Union[UEFIEventType, int], pcr: int
 ) -> Type[UEFIEvent]:
-    key: Union[UEFIEventType, Tuple[UEFIEventType, int]]
-    key = (event_type, pcr)
-    if key in _event_handlers:
-        return _event_handlers[key]
-    key = event_type
-    return _event_handlers.get(key, UEFIUnknownEvent)
+    return _resolve_event_handler(event_type << 32 | pcr)
+
 
+EFI_GLOBAL_VARIABLE = UUID("8be4df61-93ca-11d2-aa0d-00e098032b8c")
+EFI_IMAGE_SECURITY_DATABASE = UUID("d719b2cb-3d3a-4596-a3bc-dad00e67656f")
 
-_variable_handlers = dict()
+# keyed by the GUID as an int, which hashes in C unlike UUID, and the
+# UTF-16 encoded name
+_variable_handlers: Dict[Tuple[int, bytes], Type[UEFIVariable]] = dict()
 
 
 def register_variable_handler(
@@ -103,23 +165,162 @@ def register_variable_handler(
 ) -> None:
     if isinstance(unicode_name, str):
         unicode_name = unicode_name.encode("utf-16-le")
-    _variable_handlers[(variable_name, unicode_name)] = handler
+    _variable_handlers[(variable_name.int, unicode_name)] = handler
+    _resolve_variable_handler.cache_clear()
+
+
+_variable_pattern_handlers: Dict[
+    int, List[Tuple[Pattern, Type[UEFIVariable]]]
+] = dict()
+
+
+def register_variable_pattern_handler(
+    variable_name: UUID,
+    pattern: str,
+    handler: Type[UEFIVariable],
+) -> None:
+    """Register a handler for every variable name matching pattern.
+
+    Used for families of variables such as Boot####, which would otherwise
+    need one registration per name. Exact registrations take precedence.
+    """
+    _variable_pattern_handlers.setdefault(variable_name.int, []).append(
+        (re.compile(pattern), handler)
+    )
+    _resolve_variable_handler.cache_clear()
 
 
 def lookup_variable_handler(
     variable_name: UUID, unicode_name: bytes
 ) -> Type[UEFIVariable]:
-    return _variable_handlers.get(
-        (variable_name, unicode_name), UEFIUnknownVariable
-    )
+    return _resolve_variable_handler(variable_name.int, unicode_name)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_variable_handler(
+    guid: int, unicode_name: bytes
+) -> Type[UEFIVariable]:
+    # logs measure the same variables on every boot, so a name is matched
+    # against the patterns once
+    handler = _variable_handlers.get((guid, unicode_name))
+    if handler is not None:
+        return handler
+    patterns = _variable_pattern_handlers.get(guid)
+    if patterns:
+        try:
+            name = unicode_name.decode("utf-16-le")
+        except UnicodeDecodeError:
+            return UEFIUnknownVariable
+        for pattern, handler in patterns:
+            if pattern.fullmatch(name):
+                return handler
+    return UEFIUnknownVariable
+
+
+# the PCR, event type, digests and event data of an event
+_RawEvent = Tuple[
+    int, Union[UEFIEventType, int], Dict[DigestAlgorithm, bytes], memoryview
+]
+
+
+def _parse_digests(
+    data: memoryview,
+    off: int,
+    end: int,
+    sizes: Dict[int, Tuple[DigestAlgorithm, int]],
+) -> Tuple[Dict[DigestAlgorithm, bytes], int]:
+    """Parses the digest count and digests at off.
+
+    Returns:
+      A tuple of the digests and the new offset.
+    """
+    if off + 4 > end:
+        raise EOFError
+    (num_digs,) = _U32.unpack_from(data, off)
+    off += 4
+    unpack_algid = _U16.unpack_from
+    digests = dict()
+    while num_digs:
+        if off + 2 > end:
+            raise EOFError
+        (algid,) = unpack_algid(data, off)
+        off += 2
+        entry = sizes.get(algid)
+        if entry is None:
+            alg = _ALG_BY_ID.get(algid)
+            if alg is None:
+                alg = DigestAlgorithm(algid)
+            raise KeyError(alg)
+        alg, digsize = entry
+        dend = off + digsize
+        if dend > end:
+            raise EOFError
+        digests[alg] = bytes(data[off:dend])
+        off = dend
+        num_digs -= 1
+    return digests, off
+
+
+def _parse_event_header(
+    data: memoryview,
+    off: int,
+    end: int,
+    sizes: Dict[int, Tuple[DigestAlgorithm, int]],
+) -> Tuple[
+    int, Union[UEFIEventType, int], Dict[DigestAlgorithm, bytes], int, int
+]:
+    """Parses everything but the event data of the event at off.
+
+    Returns:
+      A tuple of the PCR, event type, digests and the offsets of the start
+      and end of the event data.
+    """
+    if off + 8 > end:
+        raise EOFError
+    pcr, event_type = _EVENT_PCR_TYPE.unpack_from(data, off)
+    digests, off = _parse_digests(data, off + 8, end, sizes)
+    if off + 4 > end:
+        raise EOFError
+    (size,) = _U32.unpack_from(data, off)
+    off += 4
+    if off + size > end:
+        raise EOFError
+    event_type = _EVT_BY_ID.get(event_type, event_type)
+    return pcr, event_type, digests, off, off + size
+
+
+@lru_cache(maxsize=256)
+def guid_from_le(b: bytes) -> UUID:
+    """Get the UUID for the 16 bytes of a little endian encoded GUID.
+
+    Logs repeat a handful of GUIDs and UUIDs are immutable, so the UUIDs
+    are shared between lookups.
+    """
+    return UUID(bytes_le=b)
 
 
 class UEFIParser:
-    def __init__(self, data: bytes):
-        self._data = data
-        self._offset = 0
+    def __init__(
+        self,
+        data: Union[bytes, memoryview],
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ):
+        """Set up a parser over data.
+
+        Args:
+          data: The buffer to parse.
+          offset: Where in data to start parsing.
+          limit: Where in data to stop parsing, the end of data if None.
+        """
+        self._data = memoryview(data)
+        self._offset = offset
+        self._limit = len(self._data) if limit is None else limit
         self._uintn = 2
         self._digest_sizes: Dict[DigestAlgorithm, int] = dict()
+        self._digest_size_by_id: Dict[int, Tuple[DigestAlgorithm, int]] = (
+            dict()
+        )
 
     @property
     def offset(self) -> int:
@@ -127,7 +328,7 @@ class UEFIParser:
 
     @property
     def left(self) -> int:
-        return len(self._data) - self.offset
+        return self._limit - self._offset
 
     @property
     def uintn_size(self) -> int:
@@ -137,86 +338,169 @@ class UEFIParser:
             return 4
         raise AttributeError
 
-    def get_bytes(self, size: int) -> bytes:
-        if size > self.left:
+    def get_bytes(self, size: int) -> memoryview:
+        """Get the next size bytes as a view.
+
+        size must not be negative, all callers pass sizes read as unsigned
+        integers.
+        """
+        off = self._offset
+        end = off + size
+        if end > self._limit:
             raise EOFError
-        elif size < 0:
-            raise ValueError
-        b = self._data[self.offset:self.offset+size]
-        self._offset += size
-        return b
+        self._offset = end
+        return self._data[off:end]
 
     def get_int(self, size: int) -> int:
-        vb = self.get_bytes(size)
-        return int.from_bytes(vb, byteorder="little")
+        st = _UINTS.get(size)
+        if st is None:
+            vb = self.get_bytes(size)
+            return int.from_bytes(vb, byteorder="little")
+        off = self._offset
+        if off + size > self._limit:
+            raise EOFError
+        (v,) = st.unpack_from(self._data, off)
+        self._offset = off + size
+        return v
 
     def get_uint32(self) -> int:
-        return self.get_int(4)
+        off = self._offset
+        if off + 4 > self._limit:
+            raise EOFError
+        (v,) = _U32.unpack_from(self._data, off)
+        self._offset = off + 4
+        return v
+
+    def get_uint64(self) -> int:
+        off = self._offset
+        if off + 8 > self._limit:
+            raise EOFError
+        (v,) = _U64.unpack_from(self._data, off)
+        self._offset = off + 8
+        return v
+
+    def get_struct(self, st: struct.Struct) -> Tuple:
+        """Unpack a fixed layout structure with one call."""
+        off = self._offset
+        end = off + st.size
+        if end > self._limit:
+            raise EOFError
+        self._offset = end
+        return st.unpack_from(self._data, off)
+
+    def push_window(self, size: int) -> int:
+        """Limit the parser to the next size bytes.
+
+        Lets nested structures be parsed in place rather than with a
+        subparser over a copy of their bytes.
+
+        Returns:
+          The previous limit, to be passed to pop_window.
+        """
+        if size > self.left:
+            raise EOFError
+        elif size < 0:
+            raise ValueError
+        prev = self._limit
+        self._limit = self._offset + size
+        return prev
 
-    def get_len_bytes(self) -> bytes:
+    def pop_window(self, prev: int) -> None:
+        """Skip what is left of the current window and restore prev."""
+        self._offset = self._limit
+        self._limit = prev
+
+    def get_len_bytes(self) -> memoryview:
         vl = self.get_uint32()
         b = self.get_bytes(vl)
         return b
 
-    def get_subparser(self, data: bytes) -> "UEFIParser":
+    def get_subparser(
+        self, data: Union[bytes, memoryview]
+    ) -> "UEFIParser":
         subparser = type(self)(
             data
         )
         subparser._uintn = self._uintn
         return subparser
 
+    def get_subparser_view(self, size: int) -> "UEFIParser":
+        """Get a parser over the next size bytes, sharing this buffer.
+
+        Unlike get_subparser, the data is not sliced, the subparser reads
+        the same buffer between its own offset and limit.
+        """
+        off = self._offset
+        end = off + size
+        if end > self._limit:
+            raise EOFError
+        self._offset = end
+        subparser = type(self)(self._data, off, end)
+        subparser._uintn = self._uintn
+        return subparser
+
     def get_guid(self) -> UUID:
-        b = self.get_bytes(16)
-        return UUID(bytes_le=b)
-
-    def get_utf16(self) -> bytes:
-        b = bytearray()
-        while True:
-            c = self.get_bytes(2)
-            b.extend(c)
-            if c == b"\x00\x00":
-                break
-        return bytes(b)
+        return guid_from_le(bytes(self.get_bytes(16)))
+
+    def get_variable_header(self) -> Tuple[UUID, int, int]:
+        """Get the header leading the data of variable events.
+
+        Returns:
+          A tuple of the variable GUID, the number of UTF-16 code units in
+          the name and the size of the variable data.
+        """
+        guid, unlen, vdlen = self.get_struct(_VARIABLE_HEADER)
+        return guid_from_le(guid), unlen, vdlen
+
+    def get_utf16(self) -> memoryview:
+        start = self._offset
+        m = _UTF16_STRING.match(self._data, start, self._limit)
+        if m is None:
+            raise EOFError
+        end = m.end()
+        self._offset = end
+        return self._data[start:end]
 
     def get_digests(self) -> Dict[DigestAlgorithm, bytes]:
-        num_digs = self.get_uint32()
-        digests = dict()
-        while num_digs:
-            algid = self.get_int(2)
-            alg = DigestAlgorithm(algid)
-            digsize = self._digest_sizes[alg]
-            digest = self.get_bytes(digsize)
-            digests[alg] = digest
-            num_digs -= 1
+        digests, self._offset = _parse_digests(
+            self._data, self._offset, self._limit, self._digest_size_by_id
+        )
         return digests
 
     def parse_header_event(self) -> SpecIDEvent:
         pcr = self.get_uint32()
         event_type = self.get_uint32()
-        digest = self.get_bytes(20)
-        subdata = self.get_len_bytes()
-        subparser = self.get_subparser(subdata)
-        signature = subparser.get_bytes(16)
-        platform_class = subparser.get_uint32()
-        spec_version_minor = subparser.get_int(1)
-        spec_version_major = subparser.get_int(1)
-        spec_errata = subparser.get_int(1)
-        uintn_size = subparser.get_int(1)
-        num_digs = subparser.get_uint32()
-        digest_sizes = dict()
-        while num_digs:
-            algid = subparser.get_int(2)
-            algsize = subparser.get_int(2)
-            alg = DigestAlgorithm(algid)
-            digest_sizes[alg] = algsize
-            num_digs -= 1
-        vendor_info_size = subparser.get_int(1)
+        digest = bytes(self.get_bytes(20))
+        prev = self.push_window(self.get_uint32())
+        try:
+            (
+                signature,
+                platform_class,
+                spec_version_minor,
+                spec_version_major,
+                spec_errata,
+                uintn_size,
+                num_digs,
+            ) = self.get_struct(_SPECID_HEADER)
+            algs = self.get_bytes(num_digs * _SPECID_ALG.size)
+            digest_sizes = dict()
+            for algid, algsize in _SPECID_ALG.iter_unpack(algs):
+                alg = _ALG_BY_ID.get(algid)
+                if alg is None:
+                    alg = DigestAlgorithm(algid)
+                digest_sizes[alg] = algsize
+            vendor_info_size = self.get_int(1)
+        finally:
+            self.pop_window(prev)
         self._uintn = uintn_size
         self._digest_sizes = digest_sizes
+        self._digest_size_by_id = {
+            int(alg): (alg, size) for alg, size in digest_sizes.items()
+        }
         digests = {DigestAlgorithm.sha1: digest}
         return SpecIDEvent(
             pcr=pcr,
-            event_type=UEFIEventType(event_type),
+            event_type=_EVT_BY_ID.get(event_type, event_type),
             digests=digests,
             signature=signature,
             platform_class=platform_class,
@@ -229,17 +513,34 @@ class UEFIParser:
         )
 
     def parse_event(self) -> UEFIEvent:
-        pcr = self.get_uint32()
-        event_type = self.get_uint32()
-        event_type = UEFIEventType(event_type)
-        digests = self.get_digests()
-        header = UEFIEvent(
-            pcr=pcr,
-            event_type=event_type,
-            digests=digests,
+        pcr, event_type, digests, self._offset, end = _parse_event_header(
+            self._data, self._offset, self._limit, self._digest_size_by_id
         )
-        subdata = self.get_len_bytes()
-        subparser = self.get_subparser(subdata)
-        cls = lookup_event_handler(event_type, pcr)
-        event = cls.parse(subparser, header)
+        header = UEFIEvent(pcr, event_type, digests)
+        prev = self.push_window(end - self._offset)
+        try:
+            parse = _resolve_event_parse(event_type << 32 | pcr)
+            event = parse(self, header)
+        finally:
+            self.pop_window(prev)
         return event
+
+    def iter_raw_events(self) -> Iterator[_RawEvent]:
+        """Iterate over the remaining events without parsing their data.
+
+        Must be called after parse_header_event.
+
+        Yields:
+          A tuple of the PCR, event type, digests and a view of the event
+          data of each event, to be parsed later if needed.
+        """
+        data = self._data
+        limit = self._limit
+        sizes = self._digest_size_by_id
+        off = self._offset
+        while off < limit:
+            pcr, event_type, digests, start, off = _parse_event_header(
+                data, off, limit, sizes
+            )
+            self._offset = off
+            yield pcr, event_type, digests, data[start:off]
@@ -5,11 +5,30 @@ This module implements UEFI device path structures.
 """
 
 
-from .base import UEFIParser, UEFIVariable, register_variable_handler
+from array import array
+from .base import (
+    EFI_GLOBAL_VARIABLE,
+    UEFIParser,
+    UEFIVariable,
+    register_variable_handler,
+    register_variable_pattern_handler,
+)
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Tuple, Union, Type
+from typing import Callable, Dict, Tuple, Union, Type
 from uuid import UUID
+import struct
+import sys
+
+
+# type, subtype and length of a device path node
+_DP_HEADER = struct.Struct("<BBH")
+# partition number, start, size, signature, MBR type and signature type
+_HARDDRIVE = struct.Struct("<IQQ16sBB")
+_ACPI = struct.Struct("<II")
+_PCI = struct.Struct("<BB")
+_NVME_NAMESPACE = struct.Struct("<IQ")
+_U32BE = struct.Struct(">I")
 
 
 class DeviceType(IntEnum):
@@ -21,6 +40,9 @@ class DeviceType(IntEnum):
     end = 0x7F
 
 
+_DEVICE_TYPE_BY_ID = {int(t): t for t in DeviceType}
+
+
 class BaseDeviceSubType(IntEnum):
     end = 1
     entire_end = 0xFF
@@ -62,17 +84,54 @@ class PartitionSignatureType(IntEnum):
     guid = 2
 
 
-@dataclass
+_MBR_TYPE_BY_ID = {int(t): t for t in MBRType}
+_SIGNATURE_TYPE_BY_ID = {int(t): t for t in PartitionSignatureType}
+_SIGNATURE_PARSERS: Dict[int, Callable[[bytes], Union[None, int, UUID]]] = {
+    PartitionSignatureType.none: lambda sb: None,
+    PartitionSignatureType.mbr: lambda sb: _U32BE.unpack_from(sb)[0],
+    PartitionSignatureType.guid: lambda sb: UUID(bytes_le=sb),
+}
+
+
+_SUBTYPE_ENUMS: Dict[DeviceType, Type[IntEnum]] = {
+    DeviceType.hardware: HardwareDeviceSubType,
+    DeviceType.acpi: AcpiDeviceSubType,
+    DeviceType.messaging: MsgDeviceSubType,
+    DeviceType.media: MediaDeviceSubType,
+    DeviceType.end: BaseDeviceSubType,
+}
+# every known subtype member, keyed by device type and subtype value
+_SUBTYPE_BY_ID: Dict[Tuple[int, int], IntEnum] = {
+    (int(dt), int(st)): st
+    for dt, subtypes in _SUBTYPE_ENUMS.items()
+    for st in subtypes
+}
+
+
+@dataclass(slots=True)
 class DevicePath:
     device_type: DeviceType
     device_subtype: int
 
+    def subtype_enum(self) -> IntEnum:
+        """Get the device subtype as a member of the device type's enum.
+
+        Raises:
+          KeyError: If there is no subtype enum for the device type.
+          ValueError: If the subtype is unknown.
+        """
+        st = _SUBTYPE_BY_ID.get((self.device_type, self.device_subtype))
+        if st is None:
+            # raises the KeyError or ValueError
+            st = _SUBTYPE_ENUMS[self.device_type](self.device_subtype)
+        return st
+
     @classmethod
     def parse(cls, parser: UEFIParser, header: "DevicePath") -> "DevicePath":
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class UnknownDevicePath(DevicePath):
     data: bytes
 
@@ -80,7 +139,7 @@ class UnknownDevicePath(DevicePath):
     def parse(
         cls, parser: UEFIParser, header: DevicePath
     ) -> "UnknownDevicePath":
-        data = parser.get_bytes(parser.left)
+        data = bytes(parser.get_bytes(parser.left))
         return cls(
             device_type=header.device_type,
             device_subtype=header.device_subtype,
@@ -105,9 +164,8 @@ def lookup_device_path_handler(
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class AcpiDevicePath(DevicePath):
-    device_subtype: AcpiDeviceSubType
     hid: int
     uid: int
 
@@ -115,11 +173,10 @@ class AcpiDevicePath(DevicePath):
     def parse(
         cls, parser: UEFIParser, header: DevicePath
     ) -> "AcpiDevicePath":
-        hid = parser.get_uint32()
-        uid = parser.get_uint32()
+        hid, uid = parser.get_struct(_ACPI)
         return cls(
             device_type=header.device_type,
-            device_subtype=AcpiDeviceSubType(header.device_subtype),
+            device_subtype=header.device_subtype,
             hid=hid,
             uid=uid,
         )
@@ -130,9 +187,8 @@ register_device_path_handler(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class PCIDevicePath(DevicePath):
-    device_subtype: HardwareDeviceSubType
     function: int
     device: int
 
@@ -140,11 +196,10 @@ class PCIDevicePath(DevicePath):
     def parse(
         cls, parser: UEFIParser, header: DevicePath
     ) -> "PCIDevicePath":
-        function = parser.get_int(1)
-        device = parser.get_int(1)
+        function, device = parser.get_struct(_PCI)
         return cls(
             device_type=header.device_type,
-            device_subtype=HardwareDeviceSubType(header.device_subtype),
+            device_subtype=header.device_subtype,
             function=function,
             device=device,
         )
@@ -155,12 +210,12 @@ register_device_path_handler(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class MsgDevicePath(DevicePath):
-    device_subtype: MsgDeviceSubType
+    pass
 
 
-@dataclass
+@dataclass(slots=True)
 class MsgNVMENamespaceDevicePath(MsgDevicePath):
     namespace_id: int
     namespace_uuid: int
@@ -169,11 +224,11 @@ class MsgNVMENamespaceDevicePath(MsgDevicePath):
     def parse(
         cls, parser: UEFIParser, header: DevicePath
     ) -> "MsgNVMENamespaceDevicePath":
-        namespace_id = parser.get_uint32()
-        namespace_uuid = parser.get_int(8)  # FIXME, might be big endian
+        # FIXME, namespace_uuid might be big endian
+        namespace_id, namespace_uuid = parser.get_struct(_NVME_NAMESPACE)
         return cls(
             device_type=header.device_type,
-            device_subtype=MsgDeviceSubType(header.device_subtype),
+            device_subtype=header.device_subtype,
             namespace_id=namespace_id,
             namespace_uuid=namespace_uuid,
         )
@@ -186,46 +241,59 @@ register_device_path_handler(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaDevicePath(DevicePath):
-    device_subtype: MediaDeviceSubType
+    pass
 
 
-@dataclass
+@dataclass(slots=True)
 class HarddriveDevicePath(MediaDevicePath):
     partition_number: int
     partition_start: int
     partition_size: int
     signature: Union[None, int, UUID]
-    mbr_type: MBRType
-    signature_type: PartitionSignatureType
+    mbr_type: int
+    signature_type: int
+
+    def mbr_type_enum(self) -> MBRType:
+        mt = _MBR_TYPE_BY_ID.get(self.mbr_type)
+        if mt is None:
+            mt = MBRType(self.mbr_type)
+        return mt
+
+    def signature_type_enum(self) -> PartitionSignatureType:
+        st = _SIGNATURE_TYPE_BY_ID.get(self.signature_type)
+        if st is None:
+            st = PartitionSignatureType(self.signature_type)
+        return st
 
     @classmethod
     def parse(
         cls, parser: UEFIParser, header: DevicePath
     ) -> "HarddriveDevicePath":
-        signature: Union[None, int, UUID]
-        partition_number = parser.get_uint32()
-        partition_start = parser.get_int(8)
-        partition_size = parser.get_int(8)
-        sb = parser.get_bytes(16)
-        mbr_type = parser.get_int(1)
-        signature_type = parser.get_int(1)
-        signature_type = PartitionSignatureType(signature_type)
-        if signature_type == PartitionSignatureType.none:
-            signature = None
-        elif signature_type == PartitionSignatureType.mbr:
-            signature = int.from_bytes(sb[0:4], byteorder="big")
-        elif signature_type == PartitionSignatureType.guid:
-            signature = UUID(bytes_le=sb)
+        (
+            partition_number,
+            partition_start,
+            partition_size,
+            sb,
+            mbr_type,
+            signature_type,
+        ) = parser.get_struct(_HARDDRIVE)
+        parse_signature = _SIGNATURE_PARSERS.get(signature_type)
+        if parse_signature is None:
+            raise ValueError(
+                f"{signature_type} is not a valid PartitionSignatureType"
+            )
+        if mbr_type not in _MBR_TYPE_BY_ID:
+            raise ValueError(f"{mbr_type} is not a valid MBRType")
         return cls(
             device_type=header.device_type,
-            device_subtype=MediaDeviceSubType(header.device_subtype),
+            device_subtype=header.device_subtype,
             partition_number=partition_number,
             partition_start=partition_start,
             partition_size=partition_size,
-            signature=signature,
-            mbr_type=MBRType(mbr_type),
+            signature=parse_signature(sb),
+            mbr_type=mbr_type,
             signature_type=signature_type,
         )
 
@@ -237,16 +305,16 @@ register_device_path_handler(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class FileDevicePath(MediaDevicePath):
     path_name: bytes
 
     @classmethod
     def parse(cls, parser: UEFIParser, header: DevicePath) -> "FileDevicePath":
-        path_name = parser.get_bytes(parser.left)
+        path_name = bytes(parser.get_bytes(parser.left))
         return cls(
             device_type=header.device_type,
-            device_subtype=MediaDeviceSubType(header.device_subtype),
+            device_subtype=header.device_subtype,
             path_name=path_name
         )
 
@@ -258,9 +326,8 @@ register_device_path_handler(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class EntireEndDevicePath(DevicePath):
-    device_subtype: BaseDeviceSubType
 
     @classmethod
     def parse(
@@ -268,7 +335,7 @@ class EntireEndDevicePath(DevicePath):
     ) -> "EntireEndDevicePath":
         return cls(
             device_type=header.device_type,
-            device_subtype=BaseDeviceSubType(header.device_subtype)
+            device_subtype=header.device_subtype
         )
 
 
@@ -279,26 +346,46 @@ register_device_path_handler(
 )
 
 
+# device paths made of just a fixed layout, parse_device_path builds these
+# directly instead of calling their parse method
+_FIXED_DEVICE_PATHS: Dict[Type[DevicePath], struct.Struct] = {
+    AcpiDevicePath: _ACPI,
+    PCIDevicePath: _PCI,
+    MsgNVMENamespaceDevicePath: _NVME_NAMESPACE,
+}
+
+
 def parse_device_path(parser: UEFIParser) -> Tuple[DevicePath, ...]:
     entries = list()
+    get_struct = parser.get_struct
+    push_window = parser.push_window
+    pop_window = parser.pop_window
+    device_types = _DEVICE_TYPE_BY_ID
+    handlers = _device_path_handlers
+    fixed = _FIXED_DEVICE_PATHS
     while parser.left:
-        device_type = parser.get_int(1)
-        device_type = DeviceType(device_type)
-        device_subtype = parser.get_int(1)
-        header = DevicePath(
-            device_type=DeviceType(device_type),
-            device_subtype=device_subtype,
-        )
-        dl = parser.get_int(2)
-        subdata = parser.get_bytes(dl - 4)
-        subparser = parser.get_subparser(subdata)
-        handler = lookup_device_path_handler(device_type, device_subtype)
-        dp = handler.parse(subparser, header)
+        device_type, device_subtype, dl = get_struct(_DP_HEADER)
+        dt = device_types.get(device_type)
+        if dt is None:
+            dt = DeviceType(device_type)
+        prev = push_window(dl - 4)
+        try:
+            handler = handlers.get((dt, device_subtype), UnknownDevicePath)
+            layout = fixed.get(handler)
+            if layout is not None:
+                dp = handler(dt, device_subtype, *get_struct(layout))
+            else:
+                header = DevicePath(
+                    device_type=dt, device_subtype=device_subtype
+                )
+                dp = handler.parse(parser, header)
+        finally:
+            pop_window(prev)
         entries.append(dp)
     return tuple(entries)
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIBootVariable(UEFIVariable):
     attributes: int  # FIXME, add enum
     description: bytes
@@ -309,11 +396,13 @@ class UEFIBootVariable(UEFIVariable):
     def parse(cls, parser: UEFIParser) -> "UEFIBootVariable":
         attributes = parser.get_uint32()
         fpl = parser.get_int(2)
-        description = parser.get_utf16()
-        subdata = parser.get_bytes(fpl)
-        subparser = parser.get_subparser(subdata)
-        file_path_list = parse_device_path(subparser)
-        optional_data = parser.get_bytes(parser.left)
+        description = bytes(parser.get_utf16())
+        prev = parser.push_window(fpl)
+        try:
+            file_path_list = parse_device_path(parser)
+        finally:
+            parser.pop_window(prev)
+        optional_data = bytes(parser.get_bytes(parser.left))
         return cls(
             attributes=attributes,
             description=description,
@@ -322,29 +411,30 @@ class UEFIBootVariable(UEFIVariable):
         )
 
 
-for order in range(0, 65535):
-    register_variable_handler(
-        UUID("8be4df61-93ca-11d2-aa0d-00e098032b8c"),
-        f"Boot{order:04X}",
-        UEFIBootVariable,
-    )
+register_variable_pattern_handler(
+    EFI_GLOBAL_VARIABLE,
+    r"Boot(?!FFFF)[0-9A-F]{4}",
+    UEFIBootVariable,
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIBootOrderVariable(UEFIVariable):
     boot_order: Tuple[int, ...]
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "UEFIBootOrderVariable":
-        entries = list()
-        while parser.left:
-            entry = parser.get_int(2)
-            entries.append(entry)
+        if parser.left & 1:
+            raise EOFError
+        entries = array("H")
+        entries.frombytes(parser.get_bytes(parser.left))
+        if sys.byteorder != "little":
+            entries.byteswap()
         return cls(boot_order=tuple(entries))
 
 
 register_variable_handler(
-    UUID("8be4df61-93ca-11d2-aa0d-00e098032b8c"),
+    EFI_GLOBAL_VARIABLE,
     "BootOrder",
     UEFIBootOrderVariable,
 )
@@ -5,9 +5,10 @@ This module implements UEFI structures
 """
 
 from .base import (
+    guid_from_le,
     UEFIEvent,
     UEFIParser,
-    register_event_handler,
+    register_event_handlers,
     lookup_variable_handler,
     UEFIVariable,
 )
@@ -17,9 +18,17 @@ from . import secureboot
 from dataclasses import dataclass
 from uuid import UUID
 from typing import Tuple
+import struct
 
 
-@dataclass
+# the GPT header, with the reserved field skipped, and a partition entry
+_GPT_HEADER = struct.Struct("<QIII4xQQQQ16sQIII")
+_GPT_ENTRY = struct.Struct("<16s16sQQQ72s")
+# a handoff table entry, vendor guid and table address
+_HANDOFF_ENTRY = struct.Struct("<16sQ")
+
+
+@dataclass(slots=True)
 class UEFI_EV_S_CRTM_ContentsEvent(UEFIEvent):
     blob_description: bytes
     blob_base: int
@@ -30,9 +39,9 @@ class UEFI_EV_S_CRTM_ContentsEvent(UEFIEvent):
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_S_CRTM_ContentsEvent":
         ds = parser.get_int(1)
-        blob_description = parser.get_bytes(ds)
-        blob_base = parser.get_int(8)
-        blob_length = parser.get_int(8)
+        blob_description = bytes(parser.get_bytes(ds))
+        blob_base = parser.get_uint64()
+        blob_length = parser.get_uint64()
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -43,12 +52,7 @@ class UEFI_EV_S_CRTM_ContentsEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_s_crtm_contents, UEFI_EV_S_CRTM_ContentsEvent, pcr=0
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_S_CRTM_VersionEvent(UEFIEvent):
     version_string: bytes
 
@@ -56,7 +60,7 @@ class UEFI_EV_S_CRTM_VersionEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_S_CRTM_VersionEvent":
-        version_string = parser.get_bytes(parser.left)
+        version_string = bytes(parser.get_bytes(parser.left))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -65,12 +69,7 @@ class UEFI_EV_S_CRTM_VersionEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_s_crtm_version, UEFI_EV_S_CRTM_VersionEvent, pcr=0
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EFI_PlatformFirmwareBlobEvent(UEFIEvent):
     blob_base: int
     blob_length: int
@@ -79,8 +78,8 @@ class UEFI_EV_EFI_PlatformFirmwareBlobEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_EFI_PlatformFirmwareBlobEvent":
-        blob_base = parser.get_int(8)
-        blob_length = parser.get_int(8)
+        blob_base = parser.get_uint64()
+        blob_length = parser.get_uint64()
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -90,28 +89,7 @@ class UEFI_EV_EFI_PlatformFirmwareBlobEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_platform_firmware_blob,
-    UEFI_EV_EFI_PlatformFirmwareBlobEvent,
-    pcr=0,
-)
-
-
-register_event_handler(
-    UEFIEventType.ev_efi_platform_firmware_blob,
-    UEFI_EV_EFI_PlatformFirmwareBlobEvent,
-    pcr=2,
-)
-
-
-register_event_handler(
-    UEFIEventType.ev_efi_platform_firmware_blob,
-    UEFI_EV_EFI_PlatformFirmwareBlobEvent,
-    pcr=4,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFIVariableDataEvent(UEFIEvent):
     variable_name: UUID
     unicode_name: bytes
@@ -127,12 +105,9 @@ class UEFIVariableDataEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFIVariableDataEvent":
-        variable_name = parser.get_guid()
-        unlen = parser.get_int(8)
-        vdlen = parser.get_int(8)
-        unicode_name = parser.get_bytes(unlen * 2)
-        vdata = parser.get_bytes(vdlen)
-        subparser = parser.get_subparser(vdata)
+        variable_name, unlen, vdlen = parser.get_variable_header()
+        unicode_name = bytes(parser.get_bytes(unlen * 2))
+        subparser = parser.get_subparser_view(vdlen)
         handler = lookup_variable_handler(variable_name, unicode_name)
         variable_data = handler.parse(subparser)
         if parser.left:
@@ -147,17 +122,7 @@ class UEFIVariableDataEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_variable_driver_config, UEFIVariableDataEvent
-)
-
-
-register_event_handler(
-    UEFIEventType.ev_efi_variable_boot, UEFIVariableDataEvent
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_SeparatorEvent(UEFIEvent):
     data: bytes
 
@@ -165,7 +130,7 @@ class UEFI_EV_SeparatorEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_SeparatorEvent":
-        data = parser.get_bytes(parser.left)
+        data = bytes(parser.get_bytes(parser.left))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -174,12 +139,7 @@ class UEFI_EV_SeparatorEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_separator, UEFI_EV_SeparatorEvent
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EFI_ActionEvent(UEFIEvent):
     action: bytes
 
@@ -187,7 +147,7 @@ class UEFI_EV_EFI_ActionEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_EFI_ActionEvent":
-        action = parser.get_bytes(parser.left)
+        action = bytes(parser.get_bytes(parser.left))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -196,12 +156,7 @@ class UEFI_EV_EFI_ActionEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_action, UEFI_EV_EFI_ActionEvent
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EF_EFI_BootServicesApplicationEvent(UEFIEvent):
     image_location_in_memory: int
     image_length_in_memory: int
@@ -212,13 +167,15 @@ class UEFI_EF_EFI_BootServicesApplicationEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EF_EFI_BootServicesApplicationEvent":
-        image_location_in_memory = parser.get_int(8)
-        image_length_in_memory = parser.get_int(8)
-        image_link_time_address = parser.get_int(8)
-        dpl = parser.get_int(8)
-        dp_data = parser.get_bytes(dpl)
-        dpparser = parser.get_subparser(dp_data)
-        device_path = parse_device_path(dpparser)
+        image_location_in_memory = parser.get_uint64()
+        image_length_in_memory = parser.get_uint64()
+        image_link_time_address = parser.get_uint64()
+        dpl = parser.get_uint64()
+        prev = parser.push_window(dpl)
+        try:
+            device_path = parse_device_path(parser)
+        finally:
+            parser.pop_window(prev)
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -230,13 +187,7 @@ class UEFI_EF_EFI_BootServicesApplicationEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_boot_services_application,
-    UEFI_EF_EFI_BootServicesApplicationEvent,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_IPLEvent(UEFIEvent):
     data: bytes
 
@@ -244,7 +195,7 @@ class UEFI_EV_IPLEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_IPLEvent":
-        data = parser.get_bytes(parser.left)
+        data = bytes(parser.get_bytes(parser.left))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -253,12 +204,7 @@ class UEFI_EV_IPLEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_ipl, UEFI_EV_IPLEvent,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_PostCodeEvent(UEFIEvent):
     post_code: bytes
 
@@ -266,7 +212,7 @@ class UEFI_EV_PostCodeEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_PostCodeEvent":
-        post_code = parser.get_bytes(parser.left)
+        post_code = bytes(parser.get_bytes(parser.left))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -275,12 +221,7 @@ class UEFI_EV_PostCodeEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_post_code, UEFI_EV_PostCodeEvent,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EFI_HandoffTablesEvent(UEFIEvent):
     table_entries: Tuple[Tuple[UUID, int], ...]
 
@@ -288,27 +229,21 @@ class UEFI_EV_EFI_HandoffTablesEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_EFI_HandoffTablesEvent":
-        num_tables = parser.get_int(8)
-        entries = list()
-        while num_tables:
-            guid = parser.get_guid()
-            table = parser.get_int(8)
-            entries.append((guid, table))
-            num_tables -= 1
+        num_tables = parser.get_uint64()
+        raw = parser.get_bytes(num_tables * _HANDOFF_ENTRY.size)
+        entries = tuple([
+            (guid_from_le(guid), table)
+            for guid, table in _HANDOFF_ENTRY.iter_unpack(raw)
+        ])
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
             digests=header.digests,
-            table_entries=tuple(entries),
+            table_entries=entries,
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_handoff_tables, UEFI_EV_EFI_HandoffTablesEvent,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EventTagEvent(UEFIEvent):
     tagged_event_id: int
     tagged_event_data: bytes
@@ -319,7 +254,7 @@ class UEFI_EV_EventTagEvent(UEFIEvent):
     ) -> "UEFI_EV_EventTagEvent":
         tagged_event_id = parser.get_uint32()
         data_len = parser.get_uint32()
-        tagged_event_data = parser.get_bytes(data_len)
+        tagged_event_data = bytes(parser.get_bytes(data_len))
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
@@ -329,12 +264,7 @@ class UEFI_EV_EventTagEvent(UEFIEvent):
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_event_tag, UEFI_EV_EventTagEvent,
-)
-
-
-@dataclass
+@dataclass(slots=True)
 class UEFIPartitionHeader:
     signature: int
     revision: int
@@ -352,20 +282,21 @@ class UEFIPartitionHeader:
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "UEFIPartitionHeader":
-        signature = parser.get_int(8)
-        revision = parser.get_uint32()
-        header_size = parser.get_uint32()
-        header_crc32 = parser.get_uint32()
-        parser.get_uint32()  # Reserved field
-        my_lba = parser.get_int(8)
-        alternate_lba = parser.get_int(8)
-        first_usable_lba = parser.get_int(8)
-        last_usable_lba = parser.get_int(8)
-        disk_guid = parser.get_guid()
-        partition_entry_lba = parser.get_int(8)
-        number_of_partition_entries = parser.get_uint32()
-        size_of_partition_entry = parser.get_uint32()
-        partition_entry_array_crc32 = parser.get_uint32()
+        (
+            signature,
+            revision,
+            header_size,
+            header_crc32,
+            my_lba,
+            alternate_lba,
+            first_usable_lba,
+            last_usable_lba,
+            disk_guid,
+            partition_entry_lba,
+            number_of_partition_entries,
+            size_of_partition_entry,
+            partition_entry_array_crc32,
+        ) = parser.get_struct(_GPT_HEADER)
         return cls(
             signature=signature,
             revision=revision,
@@ -375,7 +306,7 @@ class UEFIPartitionHeader:
             alternate_lba=alternate_lba,
             first_usable_lba=first_usable_lba,
             last_usable_lba=last_usable_lba,
-            disk_guid=disk_guid,
+            disk_guid=guid_from_le(disk_guid),
             partition_entry_lba=partition_entry_lba,
             number_of_partition_entries=number_of_partition_entries,
             size_of_partition_entry=size_of_partition_entry,
@@ -383,7 +314,7 @@ class UEFIPartitionHeader:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFIPartitionEntry:
     partition_type_guid: UUID
     unique_partition_guid: UUID
@@ -394,19 +325,33 @@ class UEFIPartitionEntry:
 
     @property
     def name(self) -> str:
-        return self.partition_name.decode("utf-16-le")
+        # the name is NUL terminated within the fixed size field, look for
+        # an aligned terminator before decoding
+        raw = self.partition_name
+        end = raw.find(b"\x00\x00")
+        while end != -1 and end & 1:
+            end = raw.find(b"\x00\x00", end + 1)
+        if end == -1:
+            end = len(raw)
+        return raw[:end].decode("utf-16-le")
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "UEFIPartitionEntry":
-        partition_type_guid = parser.get_guid()
-        unique_partition_guid = parser.get_guid()
-        starting_lba = parser.get_int(8)
-        ending_lba = parser.get_int(8)
-        attributes = parser.get_int(8)
-        partition_name = parser.get_bytes(36 * 2)
+        return cls._from_fields(*parser.get_struct(_GPT_ENTRY))
+
+    @classmethod
+    def _from_fields(
+        cls,
+        partition_type_guid: bytes,
+        unique_partition_guid: bytes,
+        starting_lba: int,
+        ending_lba: int,
+        attributes: int,
+        partition_name: bytes,
+    ) -> "UEFIPartitionEntry":
         return cls(
-            partition_type_guid=partition_type_guid,
-            unique_partition_guid=unique_partition_guid,
+            partition_type_guid=guid_from_le(partition_type_guid),
+            unique_partition_guid=guid_from_le(unique_partition_guid),
             starting_lba=starting_lba,
             ending_lba=ending_lba,
             attributes=attributes,
@@ -414,7 +359,7 @@ class UEFIPartitionEntry:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EFI_GPTEvent(UEFIEvent):
     partition_header: UEFIPartitionHeader
     partition_entries: Tuple[UEFIPartitionEntry, ...]
@@ -424,21 +369,41 @@ class UEFI_EV_EFI_GPTEvent(UEFIEvent):
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_EFI_GPTEvent":
         partition_header = UEFIPartitionHeader.parse(parser)
-        num_partitions = parser.get_int(8)
-        entries = list()
-        while num_partitions:
-            entry = UEFIPartitionEntry.parse(parser)
-            entries.append(entry)
-            num_partitions -= 1
+        num_partitions = parser.get_uint64()
+        raw = parser.get_bytes(num_partitions * _GPT_ENTRY.size)
+        from_fields = UEFIPartitionEntry._from_fields
+        entries = tuple([
+            from_fields(*fields) for fields in _GPT_ENTRY.iter_unpack(raw)
+        ])
         return cls(
             pcr=header.pcr,
             event_type=header.event_type,
             digests=header.digests,
             partition_header=partition_header,
-            partition_entries=tuple(entries),
+            partition_entries=entries,
         )
 
 
-register_event_handler(
-    UEFIEventType.ev_efi_gpt_event, UEFI_EV_EFI_GPTEvent,
-)
+# handlers keyed by event type and PCR, None handles the type on any PCR
+register_event_handlers({
+    (UEFIEventType.ev_s_crtm_contents, 0): UEFI_EV_S_CRTM_ContentsEvent,
+    (UEFIEventType.ev_s_crtm_version, 0): UEFI_EV_S_CRTM_VersionEvent,
+    (UEFIEventType.ev_efi_platform_firmware_blob, 0):
+        UEFI_EV_EFI_PlatformFirmwareBlobEvent,
+    (UEFIEventType.ev_efi_platform_firmware_blob, 2):
+        UEFI_EV_EFI_PlatformFirmwareBlobEvent,
+    (UEFIEventType.ev_efi_platform_firmware_blob, 4):
+        UEFI_EV_EFI_PlatformFirmwareBlobEvent,
+    (UEFIEventType.ev_efi_variable_driver_config, None): UEFIVariableDataEvent,
+    (UEFIEventType.ev_efi_variable_boot, None): UEFIVariableDataEvent,
+    (UEFIEventType.ev_separator, None): UEFI_EV_SeparatorEvent,
+    (UEFIEventType.ev_efi_action, None): UEFI_EV_EFI_ActionEvent,
+    (UEFIEventType.ev_efi_boot_services_application, None):
+        UEFI_EF_EFI_BootServicesApplicationEvent,
+    (UEFIEventType.ev_ipl, None): UEFI_EV_IPLEvent,
+    (UEFIEventType.ev_post_code, None): UEFI_EV_PostCodeEvent,
+    (UEFIEventType.ev_efi_handoff_tables, None):
+        UEFI_EV_EFI_HandoffTablesEvent,
+    (UEFIEventType.ev_event_tag, None): UEFI_EV_EventTagEvent,
+    (UEFIEventType.ev_efi_gpt_event, None): UEFI_EV_EFI_GPTEvent,
+})
@@ -5,6 +5,9 @@ This module implements UEFI secure boot structures.
 """
 
 from .base import (
+    EFI_GLOBAL_VARIABLE,
+    EFI_IMAGE_SECURITY_DATABASE,
+    guid_from_le,
     UEFIParser,
     UEFIVariable,
     UEFIEvent,
@@ -15,9 +18,15 @@ from ..common import UEFIEventType
 from dataclasses import dataclass
 from typing import Tuple, Type
 from uuid import UUID
+import struct
 
 
-@dataclass
+# the signature type, list size, header size and signature size that
+# start each EFI_SIGNATURE_LIST
+_SIGNATURE_LIST_HEADER = struct.Struct("<16sIII")
+
+
+@dataclass(slots=True)
 class SecureBootVariable(UEFIVariable):
     enabled: bool
 
@@ -30,13 +39,13 @@ class SecureBootVariable(UEFIVariable):
 
 
 register_variable_handler(
-    UUID("8be4df61-93ca-11d2-aa0d-00e098032b8c"),
+    EFI_GLOBAL_VARIABLE,
     "SecureBoot",
     SecureBootVariable,
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class SignatureData:
     signature_owner: UUID
 
@@ -44,20 +53,30 @@ class SignatureData:
     def parse(cls, parser: UEFIParser) -> "SignatureData":
         raise NotImplementedError
 
+    @classmethod
+    def from_bytes(cls, data: memoryview) -> "SignatureData":
+        return cls.parse(UEFIParser(data))
+
 
-@dataclass
+@dataclass(slots=True)
 class UnknownSignatureData(SignatureData):
     signature_data: bytes
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "UnknownSignatureData":
         signature_owner = parser.get_guid()
-        signature_data = parser.get_bytes(parser.left)
+        signature_data = bytes(parser.get_bytes(parser.left))
         return cls(
             signature_owner=signature_owner,
             signature_data=signature_data,
         )
 
+    @classmethod
+    def from_bytes(cls, data: memoryview) -> "UnknownSignatureData":
+        if len(data) < 16:
+            raise EOFError
+        return cls(guid_from_le(bytes(data[:16])), bytes(data[16:]))
+
 
 _signature_type_handlers = dict()
 
@@ -74,26 +93,32 @@ def lookup_signature_type_handler(
     return _signature_type_handlers.get(signature_type, UnknownSignatureData)
 
 
-@dataclass
+@dataclass(slots=True)
 class X509SignatureData(SignatureData):
     certificate: bytes
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "X509SignatureData":
         signature_owner = parser.get_guid()
-        certificate = parser.get_bytes(parser.left)
+        certificate = bytes(parser.get_bytes(parser.left))
         return cls(
             signature_owner=signature_owner,
             certificate=certificate,
         )
 
+    @classmethod
+    def from_bytes(cls, data: memoryview) -> "X509SignatureData":
+        if len(data) < 16:
+            raise EOFError
+        return cls(guid_from_le(bytes(data[:16])), bytes(data[16:]))
+
 
 register_signature_type_handler(
     UUID("a5c059a1-94e4-4aa7-87b5-ab155c2bf072"), X509SignatureData
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class SignatureList:
     signature_type: UUID
     signature_header: bytes
@@ -101,45 +126,88 @@ class SignatureList:
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "SignatureList":
-        signature_type = parser.get_guid()
-        list_size = parser.get_uint32()
-        header_size = parser.get_uint32()
-        signature_size = parser.get_uint32()
-        signature_header = parser.get_bytes(header_size)
-        list_left = list_size - (16+4+4+4)
-        signatures = list()
-        while list_left:
-            subdata = parser.get_bytes(signature_size)
-            subparser = parser.get_subparser(subdata)
-            handler = lookup_signature_type_handler(signature_type)
-            data = handler.parse(subparser)
-            signatures.append(data)
-            list_left -= len(subdata)
+        signature_type, list_size, header_size, signature_size = (
+            parser.get_struct(_SIGNATURE_LIST_HEADER)
+        )
+        list_left = list_size - _SIGNATURE_LIST_HEADER.size
+        if list_left < 0:
+            raise EOFError
+        view = parser.get_bytes(header_size + list_left)
+        return cls._parse_view(
+            view, signature_type, header_size, signature_size
+        )
+
+    @classmethod
+    def _parse_view(
+        cls,
+        view: memoryview,
+        signature_type_bytes: bytes,
+        header_size: int,
+        signature_size: int,
+    ) -> "SignatureList":
+        # view holds the list after its fixed header, the signature header
+        # followed by the signatures
+        signature_type = guid_from_le(signature_type_bytes)
+        signature_header = bytes(view[:header_size])
+        list_left = len(view) - header_size
+        if not list_left:
+            # an empty list can give a signature size of 0
+            return cls(
+                signature_type=signature_type,
+                signature_header=signature_header,
+                signatures=(),
+            )
+        if not signature_size or list_left % signature_size:
+            # the signatures can never end on the list boundary
+            raise EOFError
+        handler = lookup_signature_type_handler(signature_type)
+        from_bytes = handler.from_bytes
+        signatures = tuple([
+            from_bytes(view[o:o+signature_size])
+            for o in range(header_size, len(view), signature_size)
+        ])
         return cls(
             signature_type=signature_type,
             signature_header=signature_header,
-            signatures=tuple(signatures),
+            signatures=signatures,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class SignaturesVariable(UEFIVariable):
     signature_lists: Tuple[SignatureList, ...]
 
     @classmethod
     def parse(cls, parser: UEFIParser) -> "SignaturesVariable":
-        sigs = list()
-        while parser.left:
-            entry = SignatureList.parse(parser)
-            sigs.append(entry)
+        data = parser.get_bytes(parser.left)
+        end = len(data)
+        hsize = _SIGNATURE_LIST_HEADER.size
+        unpack_header = _SIGNATURE_LIST_HEADER.unpack_from
+        # every list gives its own size, so find all of them before parsing
+        segments = list()
+        off = 0
+        while off < end:
+            if off + hsize > end:
+                raise EOFError
+            signature_type, list_size, header_size, signature_size = (
+                unpack_header(data, off)
+            )
+            start = off + hsize
+            off = start + header_size + list_size - hsize
+            if off < start + header_size or off > end:
+                raise EOFError
+            segments.append(
+                (data[start:off], signature_type, header_size, signature_size)
+            )
+        parse_view = SignatureList._parse_view
         return cls(
-            signature_lists=tuple(sigs)
+            signature_lists=tuple([parse_view(*seg) for seg in segments])
         )
 
 
 for db in ("PK", "KEK"):
     register_variable_handler(
-        UUID("8be4df61-93ca-11d2-aa0d-00e098032b8c"),
+        EFI_GLOBAL_VARIABLE,
         db,
         SignaturesVariable,
     )
@@ -147,13 +215,13 @@ for db in ("PK", "KEK"):
 
 for db in ("db", "dbx"):
     register_variable_handler(
-        UUID("d719b2cb-3d3a-4596-a3bc-dad00e67656f"),
+        EFI_IMAGE_SECURITY_DATABASE,
         db,
         SignaturesVariable,
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class UEFI_EV_EFI_VariableAuthorityEvent(UEFIEvent):
     variable_name: UUID
     unicode_name: bytes
@@ -163,12 +231,9 @@ class UEFI_EV_EFI_VariableAuthorityEvent(UEFIEvent):
     def parse(
         cls, parser: UEFIParser, header: UEFIEvent
     ) -> "UEFI_EV_EFI_VariableAuthorityEvent":
-        variable_name = parser.get_guid()
-        unlen = parser.get_int(8)
-        vdlen = parser.get_int(8)
-        unicode_name = parser.get_bytes(unlen * 2)
-        vdata = parser.get_bytes(vdlen)
-        subparser = parser.get_subparser(vdata)
+        variable_name, unlen, vdlen = parser.get_variable_header()
+        unicode_name = bytes(parser.get_bytes(unlen * 2))
+        subparser = parser.get_subparser_view(vdlen)
         handler = UnknownSignatureData
         variable_data = handler.parse(subparser)
         if parser.left:
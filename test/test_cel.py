@@ -1,8 +1,10 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import unittest
+import struct
 from pathlib import Path
 from base64 import b64decode
+from functools import lru_cache
 from eventlogs.common import (
     DigestAlgorithm,
     ShortBufferError,
@@ -12,6 +14,9 @@ from eventlogs.common import (
 )
 from eventlogs.cel import (
     TLVParser,
+    alg_of,
+    iter_events,
+    CELEventBatch,
     CELFirmwareEndEvent,
     CELContentType,
     CELMgmtType,
@@ -22,22 +27,28 @@ from eventlogs.cel import (
     CELPCClientSTDEvent,
     CELIMATemplateEvent,
     CELVersionType,
+    CELBaseType,
 )
 
 
+SNIPPETS = Path(__file__).parent / "snippets" / "cel"
+
+
+@lru_cache(maxsize=None)
+def load_snippet(name):
+    p = Path(name)
+    if len(p.parts) > 1:
+        raise ValueError
+    return b64decode((SNIPPETS / p).read_bytes())
+
+
 class CELTest(unittest.TestCase):
     def parser_with_snippets(self, *snippets):
-        data = bytes()
-        for s in snippets:
-            p = Path(s)
-            if len(p.parts) > 1:
-                raise ValueError
-            fp = Path(__file__).parent / "snippets" / "cel" / p
-            with fp.open("rb") as sf:
-                b64data = sf.read()
-            sdata = b64decode(b64data)
-            data += sdata
-        return TLVParser(data)
+        return TLVParser(self.data_with_snippets(*snippets))
+
+    def data_with_snippets(self, *snippets):
+        parts = [load_snippet(s) for s in snippets]
+        return b"".join(parts)
 
     def test_cel_TLVParser_firmware_end(self):
         parser = self.parser_with_snippets("tlv_firmware_end.b64")
@@ -49,6 +60,8 @@ class CELTest(unittest.TestCase):
         self.assertEqual(event.digests, {DigestAlgorithm.sha1: b"\x00" * 20})
         self.assertEqual(event.content_type, CELContentType.cel)
         self.assertEqual(event.type, CELMgmtType.firmware_end)
+        (alg,) = event.digests
+        self.assertIs(alg_of(alg), DigestAlgorithm.sha1)
 
     def test_cel_TLVParser_cel_version(self):
         parser = self.parser_with_snippets("tlv_cel_version.b64")
@@ -111,6 +124,59 @@ class CELTest(unittest.TestCase):
         self.assertEqual(event.template_name, b"eat")
         self.assertEqual(event.template_data, b"falafel")
 
+    def test_cel_iter_events(self):
+        data = self.data_with_snippets(
+            "tlv_cel_version.b64",
+            "tlv_pcclient_std.b64",
+            "tlv_ima_template.b64",
+            "tlv_firmware_end.b64",
+        )
+        events = list(iter_events(data))
+        self.assertEqual(len(events), 4)
+        self.assertIsInstance(events[0], CELVersionEvent)
+        self.assertIsInstance(events[1], CELPCClientSTDEvent)
+        self.assertEqual(events[1].event_data, b"falafel")
+        self.assertIsInstance(events[2], CELIMATemplateEvent)
+        self.assertEqual(events[2].template_name, b"eat")
+        self.assertIsInstance(events[3], CELFirmwareEndEvent)
+
+        data = self.data_with_snippets("tlv_firmware_end.b64")
+        with self.assertRaises(ShortBufferError):
+            list(iter_events(data[:-1]))
+
+    def test_cel_CELEventBatch(self):
+        data = self.data_with_snippets(
+            "tlv_cel_version.b64",
+            "tlv_pcclient_std.b64",
+            "tlv_ima_template.b64",
+            "tlv_ima_template.b64",
+        )
+        batch = CELEventBatch(data)
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(list(batch.recnum), [0, 0, 0, 0])
+        self.assertEqual(list(batch.handle), [1, 1, 1, 1])
+        self.assertEqual(
+            list(batch.content_type),
+            [
+                CELContentType.cel,
+                CELContentType.pcclient_std,
+                CELContentType.ima_template,
+                CELContentType.ima_template,
+            ],
+        )
+        self.assertEqual(
+            batch.filter(content_type=CELContentType.ima_template), [2, 3]
+        )
+        self.assertEqual(batch.filter(handle=2), [])
+        self.assertEqual(
+            batch.digest(DigestAlgorithm.sha1), [b"\x00" * 20] * 4
+        )
+        self.assertEqual(batch.digest(DigestAlgorithm.sha256), [None] * 4)
+        event = batch.event(1)
+        self.assertIsInstance(event, CELPCClientSTDEvent)
+        self.assertEqual(event.event_data, b"falafel")
+        self.assertEqual(batch.to_events(), list(iter_events(data)))
+
     def test_cel_TLVParser_bad(self):
         parser = TLVParser(b"\x00")
         with self.assertRaises(ShortBufferError) as e:
@@ -154,3 +220,53 @@ class CELTest(unittest.TestCase):
         with self.assertRaises(NotConsumedError) as e:
             parser.parse_event()
         self.assertEqual(e.exception.left, 1)
+
+    def test_cel_TLVParser_nested_offset(self):
+        # errors inside the digests give the offset into the whole buffer
+        parser = TLVParser(
+            b"\x00" * 3
+            + b"\x03\x00\x00\x00\x08"
+            + b"\x04\x00\x00\x00\x14"
+            + b"\x00" * 3
+        )
+        parser.get_bytes(3)
+        with self.assertRaises(ShortBufferError) as e:
+            parser.get_digests()
+        self.assertEqual(e.exception.offset, 13)
+        self.assertEqual(e.exception.requested, 20)
+        self.assertEqual(e.exception.left, 3)
+
+    def test_cel_CELEventBatch_new_digest(self):
+        # an algorithm first seen in a later event is missing in earlier ones
+        event = self.data_with_snippets("tlv_firmware_end.b64")
+        sha256 = struct.pack(">BI", DigestAlgorithm.sha256, 32) + b"\x01" * 32
+        data = (
+            event
+            + event[:13]
+            + struct.pack(">I", 25 + len(sha256))
+            + event[17:42]
+            + sha256
+            + event[42:]
+        )
+        batch = CELEventBatch(data)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(
+            batch.digest(DigestAlgorithm.sha1), [b"\x00" * 20] * 2
+        )
+        self.assertEqual(
+            batch.digest(DigestAlgorithm.sha256), [None, b"\x01" * 32]
+        )
+        self.assertEqual(batch.to_events(), list(iter_events(data)))
+
+    def test_cel_TLVParser_get_int_max_size(self):
+        with self.assertRaises(ValueError):
+            TLVParser(b"\x00\x00\x01").get_int(3, 0)
+        self.assertEqual(TLVParser(b"\x00\x00\x01").get_int(3, 4), 1)
+
+    def test_cel_TLVParser_empty_values(self):
+        parser = TLVParser(b"\x00" * 5)
+        self.assertEqual(parser.get_tlv_int(4, CELBaseType.recnum), (0, 0))
+        self.assertFalse(parser.left)
+        parser = TLVParser(b"\x03\x00\x00\x00\x05\x04" + b"\x00" * 4)
+        self.assertEqual(parser.get_digests(), {DigestAlgorithm.sha1: b""})
+        self.assertFalse(parser.left)
@@ -1,9 +1,16 @@
 # SPDX-License-Identifier: LGPL-3.0-or-later
 
 import unittest
+import struct
 from pathlib import Path
 from base64 import b64decode
-from eventlogs.ima import IMAParser, IMATemplateField, IMAFieldD_NG
+from functools import lru_cache
+from eventlogs.ima import (
+    IMAParser,
+    IMATemplateField,
+    IMAFieldD_NG,
+    IMAFieldXattrLengths,
+)
 from eventlogs.common import (
     DigestAlgorithm,
     NotConsumedError,
@@ -12,19 +19,21 @@ from eventlogs.common import (
 )
 
 
+SNIPPETS = Path(__file__).parent / "snippets" / "ima"
+
+
+@lru_cache(maxsize=None)
+def load_snippet(name):
+    p = Path(name)
+    if len(p.parts) > 1:
+        raise ValueError
+    return b64decode((SNIPPETS / p).read_bytes())
+
+
 class IMATest(unittest.TestCase):
     def parser_with_snippets(self, *snippets):
-        data = bytes()
-        for s in snippets:
-            p = Path(s)
-            if len(p.parts) > 1:
-                raise ValueError
-            fp = Path(__file__).parent / "snippets" / "ima" / p
-            with fp.open("rb") as sf:
-                b64data = sf.read()
-            sdata = b64decode(b64data)
-            data += sdata
-        return IMAParser(data)
+        parts = [load_snippet(s) for s in snippets]
+        return IMAParser(b"".join(parts))
 
     def test_IMAParser_ima_ng(self):
         parser = self.parser_with_snippets("boot_aggregate.b64")
@@ -83,3 +92,22 @@ class IMATest(unittest.TestCase):
             )
         )
         self.assertEqual(e.exception.got, "iiiiii")
+
+    def test_IMAParser_xattrlengths(self):
+        lengths = [1, 0x100, 0x01020304]
+        for byteorder, prefix in (("little", "<"), ("big", ">")):
+            data = struct.pack(f"{prefix}I3I", 12, *lengths)
+            parser = IMAParser(data, byteorder=byteorder)
+            field = parser.parse_field(IMATemplateField.xattrlengths)
+            self.assertFalse(parser.left)
+            self.assertIsInstance(field, IMAFieldXattrLengths)
+            self.assertEqual(field.field, IMATemplateField.xattrlengths)
+            self.assertEqual(list(field.lengths), lengths)
+
+        data = struct.pack("<II", 5, 1) + b"\x00"
+        parser = IMAParser(data)
+        with self.assertRaises(ShortBufferError) as e:
+            parser.parse_field(IMATemplateField.xattrlengths)
+        self.assertEqual(e.exception.offset, 4)
+        self.assertEqual(e.exception.requested, 4)
+        self.assertEqual(e.exception.left, 1)
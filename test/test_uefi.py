@@ -0,0 +1,751 @@
+# SPDX-License-Identifier: LGPL-3.0-or-later
+
+import unittest
+import struct
+from dataclasses import asdict
+from uuid import UUID
+from eventlogs.common import DigestAlgorithm, UEFIEventType
+from eventlogs.uefi import base
+from eventlogs.uefi.base import (
+    EFI_GLOBAL_VARIABLE,
+    EFI_IMAGE_SECURITY_DATABASE,
+    UEFIParser,
+    UEFIUnknownEvent,
+    UEFIUnknownVariable,
+    UEFIVariable,
+    guid_from_le,
+    lookup_event_handler,
+    lookup_variable_handler,
+    register_event_handler,
+    register_variable_handler,
+    register_variable_pattern_handler,
+)
+from eventlogs.uefi.events import (
+    UEFI_EF_EFI_BootServicesApplicationEvent,
+    UEFI_EV_EFI_GPTEvent,
+    UEFI_EV_EFI_HandoffTablesEvent,
+    UEFI_EV_SeparatorEvent,
+    UEFIPartitionEntry,
+    UEFIVariableDataEvent,
+)
+from eventlogs.uefi.device_path import (
+    AcpiDevicePath,
+    AcpiDeviceSubType,
+    DeviceType,
+    EntireEndDevicePath,
+    FileDevicePath,
+    HarddriveDevicePath,
+    MBRType,
+    MsgNVMENamespaceDevicePath,
+    MediaDeviceSubType,
+    PartitionSignatureType,
+    PCIDevicePath,
+    UEFIBootOrderVariable,
+    UEFIBootVariable,
+    UnknownDevicePath,
+    parse_device_path,
+    register_device_path_handler,
+)
+from eventlogs.uefi.secureboot import (
+    SecureBootVariable,
+    SignatureList,
+    SignaturesVariable,
+    UnknownSignatureData,
+    X509SignatureData,
+)
+
+
+EFI_CERT_X509_GUID = UUID("a5c059a1-94e4-4aa7-87b5-ab155c2bf072")
+EFI_CERT_SHA256_GUID = UUID("c1c41626-504c-4092-aca9-41f936934328")
+DISK_GUID = UUID("99999999-8888-7777-6666-555555555555")
+ESP_GUID = UUID("c12a7328-f81f-11d2-ba4b-00a0c93ec93b")
+OWNER = UUID("77fa9abd-0359-4d32-bd60-28f4e78f784b")
+DIGEST_SIZES = {
+    DigestAlgorithm.sha1: 20,
+    DigestAlgorithm.sha256: 32,
+}
+UNKNOWN_EVENT_TYPE = 0x12345678
+
+
+def utf16(s):
+    return s.encode("utf-16-le")
+
+
+def spec_id_event():
+    data = b"Spec ID Event03\x00" + struct.pack(
+        "<IBBBBI", 0, 0, 2, 0, 2, len(DIGEST_SIZES)
+    )
+    for alg, size in DIGEST_SIZES.items():
+        data += struct.pack("<HH", alg, size)
+    data += b"\x00"
+    return (
+        struct.pack("<II", 0, UEFIEventType.ev_no_action)
+        + b"\x00" * 20
+        + struct.pack("<I", len(data))
+        + data
+    )
+
+
+def digests(n):
+    return {alg: bytes([n]) * size for alg, size in DIGEST_SIZES.items()}
+
+
+def event(pcr, event_type, data, n):
+    b = struct.pack("<III", pcr, event_type, len(DIGEST_SIZES))
+    for alg, digest in digests(n).items():
+        b += struct.pack("<H", alg) + digest
+    return b + struct.pack("<I", len(data)) + data
+
+
+def variable(guid, name, data):
+    uname = utf16(name)
+    return (
+        guid.bytes_le
+        + struct.pack("<QQ", len(uname) // 2, len(data))
+        + uname
+        + data
+    )
+
+
+def signature_list(signature_type, signatures, signature_size, header=b""):
+    data = b"".join(signatures)
+    return (
+        signature_type.bytes_le
+        + struct.pack("<III", 28 + len(data), len(header), signature_size)
+        + header
+        + data
+    )
+
+
+def device_path_node(device_type, device_subtype, payload):
+    return struct.pack(
+        "<BBH", device_type, device_subtype, len(payload) + 4
+    ) + payload
+
+
+def device_path():
+    return b"".join([
+        device_path_node(2, 1, struct.pack("<II", 0x0A0341D0, 0)),
+        device_path_node(1, 1, struct.pack("<BB", 2, 0x1F)),
+        device_path_node(
+            4,
+            1,
+            struct.pack("<IQQ", 1, 2048, 409600)
+            + DISK_GUID.bytes_le
+            + struct.pack("<BB", 2, 2),
+        ),
+        device_path_node(
+            4,
+            1,
+            struct.pack("<IQQ", 2, 63, 5000)
+            + bytes.fromhex("deadbeef").ljust(16, b"\x00")
+            + struct.pack("<BB", 1, 1),
+        ),
+        device_path_node(4, 4, utf16("\\EFI\\BOOT\\BOOTX64.EFI\x00")),
+        device_path_node(3, 5, b"\x01\x02"),
+        device_path_node(0x7F, 0xFF, b""),
+    ])
+
+
+def boot_variable():
+    path = device_path()
+    return (
+        struct.pack("<IH", 1, len(path))
+        + utf16("Linux\x00")
+        + path
+        + b"opt"
+    )
+
+
+def gpt():
+    header = struct.pack(
+        "<QIII4xQQQQ16sQIII",
+        0x5452415020494645,
+        0x10000,
+        92,
+        0xABCD,
+        1,
+        999,
+        34,
+        900,
+        DISK_GUID.bytes_le,
+        2,
+        128,
+        128,
+        0x1234,
+    )
+    entries = b"".join(
+        struct.pack(
+            "<16s16sQQQ72s",
+            ESP_GUID.bytes_le,
+            UUID(int=i + 1).bytes_le,
+            34 + i * 100,
+            133 + i * 100,
+            i,
+            utf16(f"part{i}"),
+        )
+        for i in range(2)
+    )
+    return header + struct.pack("<Q", 2) + entries
+
+
+def synthetic_log():
+    sigs = signature_list(
+        EFI_CERT_X509_GUID, [OWNER.bytes_le + b"cert"], 20
+    ) + signature_list(
+        EFI_CERT_SHA256_GUID,
+        [OWNER.bytes_le + bytes([i]) * 32 for i in range(2)],
+        48,
+    )
+    path = device_path()
+    events = [
+        (
+            7,
+            UEFIEventType.ev_efi_variable_driver_config,
+            variable(EFI_GLOBAL_VARIABLE, "SecureBoot", b"\x01"),
+        ),
+        (
+            7,
+            UEFIEventType.ev_efi_variable_driver_config,
+            variable(EFI_GLOBAL_VARIABLE, "PK", sigs),
+        ),
+        (
+            7,
+            UEFIEventType.ev_efi_variable_driver_config,
+            variable(EFI_IMAGE_SECURITY_DATABASE, "db", sigs),
+        ),
+        (
+            1,
+            UEFIEventType.ev_efi_variable_boot,
+            variable(
+                EFI_GLOBAL_VARIABLE, "BootOrder", struct.pack("<HH", 1, 0)
+            ),
+        ),
+        (
+            1,
+            UEFIEventType.ev_efi_variable_boot,
+            variable(EFI_GLOBAL_VARIABLE, "Boot0001", boot_variable()),
+        ),
+        (7, UEFIEventType.ev_separator, b"\x00" * 4),
+        (
+            4,
+            UEFIEventType.ev_efi_boot_services_application,
+            struct.pack("<QQQQ", 0x1000, 0x2000, 0, len(path)) + path,
+        ),
+        (
+            1,
+            UEFIEventType.ev_efi_handoff_tables,
+            struct.pack("<Q", 2)
+            + EFI_GLOBAL_VARIABLE.bytes_le
+            + struct.pack("<Q", 0x7000)
+            + OWNER.bytes_le
+            + struct.pack("<Q", 0x8000),
+        ),
+        (5, UEFIEventType.ev_efi_gpt_event, gpt()),
+        (9, UNKNOWN_EVENT_TYPE, b"unknown"),
+    ]
+    return spec_id_event() + b"".join(
+        event(pcr, event_type, data, n)
+        for n, (pcr, event_type, data) in enumerate(events)
+    )
+
+
+def parse_log(data):
+    parser = UEFIParser(data)
+    parser.parse_header_event()
+    events = []
+    while parser.left:
+        events.append(parser.parse_event())
+    return events
+
+
+class UEFITest(unittest.TestCase):
+    def restore_variable_handlers(self):
+        handlers = dict(base._variable_handlers)
+        patterns = {
+            k: list(v) for k, v in base._variable_pattern_handlers.items()
+        }
+
+        def restore():
+            base._variable_handlers.clear()
+            base._variable_handlers.update(handlers)
+            base._variable_pattern_handlers.clear()
+            base._variable_pattern_handlers.update(patterns)
+            base._resolve_variable_handler.cache_clear()
+
+        self.addCleanup(restore)
+
+    def restore_event_handlers(self):
+        handlers = dict(base._event_handlers)
+        pcr_handlers = dict(base._pcr_event_handlers)
+
+        def restore():
+            base._event_handlers.clear()
+            base._event_handlers.update(handlers)
+            base._pcr_event_handlers.clear()
+            base._pcr_event_handlers.update(pcr_handlers)
+            base._resolve_event_handler.cache_clear()
+            base._resolve_event_parse.cache_clear()
+
+        self.addCleanup(restore)
+
+    def test_variable_pattern_handler(self):
+        self.restore_variable_handlers()
+        boot = utf16("Boot0001")
+        self.assertIs(
+            lookup_variable_handler(EFI_GLOBAL_VARIABLE, boot),
+            UEFIBootVariable,
+        )
+        self.assertIs(
+            lookup_variable_handler(EFI_GLOBAL_VARIABLE, utf16("BootABCD")),
+            UEFIBootVariable,
+        )
+        for name in ("BootFFFF", "Bootabcd", "BootOrde", "Boot00011"):
+            self.assertIsNot(
+                lookup_variable_handler(EFI_GLOBAL_VARIABLE, utf16(name)),
+                UEFIBootVariable,
+                name,
+            )
+        self.assertIs(
+            lookup_variable_handler(EFI_GLOBAL_VARIABLE, utf16("BootFFFF")),
+            UEFIUnknownVariable,
+        )
+        # exact registrations are preferred over patterns
+        self.assertIs(
+            lookup_variable_handler(EFI_GLOBAL_VARIABLE, utf16("BootOrder")),
+            UEFIBootOrderVariable,
+        )
+        # patterns only apply to their vendor GUID
+        self.assertIs(
+            lookup_variable_handler(EFI_IMAGE_SECURITY_DATABASE, boot),
+            UEFIUnknownVariable,
+        )
+        # names that are not valid UTF-16 fall back to the unknown variable
+        self.assertIs(
+            lookup_variable_handler(EFI_GLOBAL_VARIABLE, b"\x00\xd8"),
+            UEFIUnknownVariable,
+        )
+
+        vendor = UUID(int=0x1234)
+
+        class TestVariable(UEFIVariable):
+            pass
+
+        self.assertIs(
+            lookup_variable_handler(vendor, utf16("Test01")),
+            UEFIUnknownVariable,
+        )
+        register_variable_pattern_handler(vendor, r"Test\d+", TestVariable)
+        self.assertIs(
+            lookup_variable_handler(vendor, utf16("Test01")), TestVariable
+        )
+        self.assertIs(
+            lookup_variable_handler(vendor, utf16("Test")),
+            UEFIUnknownVariable,
+        )
+
+    def test_UEFIParser_boot_variables(self):
+        events = parse_log(
+            spec_id_event()
+            + b"".join(
+                event(
+                    1,
+                    UEFIEventType.ev_efi_variable_boot,
+                    variable(EFI_GLOBAL_VARIABLE, name, boot_variable()),
+                    n,
+                )
+                for n, name in enumerate(("Boot0002", "BootFFFF", "Boot000a"))
+            )
+        )
+        boot, reserved, lowercase = events
+        self.assertIsInstance(boot, UEFIVariableDataEvent)
+        self.assertIsInstance(boot.variable_data, UEFIBootVariable)
+        self.assertEqual(
+            reserved.variable_data, UEFIUnknownVariable(boot_variable())
+        )
+        self.assertEqual(
+            lowercase.variable_data, UEFIUnknownVariable(boot_variable())
+        )
+
+    def test_UEFIParser_window(self):
+        parser = UEFIParser(b"abcdef")
+        parser.get_bytes(1)
+        prev = parser.push_window(3)
+        self.assertEqual(parser.left, 3)
+        self.assertEqual(bytes(parser.get_bytes(1)), b"b")
+        with self.assertRaises(EOFError):
+            parser.get_bytes(3)
+        with self.assertRaises(EOFError):
+            parser.push_window(3)
+        # popping skips what is left of the window
+        parser.pop_window(prev)
+        self.assertEqual(parser.left, 2)
+        self.assertEqual(bytes(parser.get_bytes(2)), b"ef")
+        with self.assertRaises(EOFError):
+            parser.push_window(1)
+
+    def test_DevicePath_enums(self):
+        acpi, pci, gpt_disk, mbr_disk, file_path, unknown_path, end = (
+            parse_device_path(UEFIParser(device_path()))
+        )
+        self.assertIs(acpi.subtype_enum(), AcpiDeviceSubType.acpi)
+        self.assertIs(gpt_disk.subtype_enum(), MediaDeviceSubType.harddrive)
+        self.assertIs(file_path.subtype_enum(), MediaDeviceSubType.filepath)
+        self.assertIs(gpt_disk.mbr_type_enum(), MBRType.gpt)
+        self.assertIs(
+            gpt_disk.signature_type_enum(), PartitionSignatureType.guid
+        )
+        self.assertIs(mbr_disk.mbr_type_enum(), MBRType.mbr)
+        self.assertIs(
+            mbr_disk.signature_type_enum(), PartitionSignatureType.mbr
+        )
+        self.assertIsInstance(gpt_disk.mbr_type, int)
+        self.assertIsInstance(gpt_disk.device_subtype, int)
+
+        # the messaging subtype enum has no member 5
+        with self.assertRaises(ValueError):
+            unknown_path.subtype_enum()
+
+        disk = HarddriveDevicePath(DeviceType.media, 1, 1, 0, 0, None, 3, 4)
+        with self.assertRaises(ValueError):
+            disk.mbr_type_enum()
+        with self.assertRaises(ValueError):
+            disk.signature_type_enum()
+
+        bios = UnknownDevicePath(DeviceType.bios_boot_speciciation, 1, b"")
+        with self.assertRaises(KeyError):
+            bios.subtype_enum()
+
+    def test_HarddriveDevicePath_bad_types(self):
+        path = device_path_node(
+            4,
+            1,
+            struct.pack("<IQQ", 1, 0, 0) + b"\x00" * 16 + struct.pack(
+                "<BB", 3, 0
+            ),
+        )
+        with self.assertRaises(ValueError) as e:
+            UEFIBootVariable.parse(
+                UEFIParser(
+                    struct.pack("<IH", 1, len(path)) + utf16("\x00") + path
+                )
+            )
+        self.assertEqual(str(e.exception), "3 is not a valid MBRType")
+
+    def test_UEFIParser_unknown_event_type(self):
+        (unknown,) = parse_log(
+            spec_id_event() + event(9, UNKNOWN_EVENT_TYPE, b"unknown", 0)
+        )
+        self.assertIsInstance(unknown, UEFIUnknownEvent)
+        self.assertIs(type(unknown.event_type), int)
+        self.assertEqual(unknown.event_type, UNKNOWN_EVENT_TYPE)
+        self.assertNotIsInstance(unknown.event_type, UEFIEventType)
+        self.assertEqual(unknown.event_data, b"unknown")
+
+    def test_guid_from_le(self):
+        guid = guid_from_le(OWNER.bytes_le)
+        self.assertEqual(guid, OWNER)
+        self.assertIs(guid_from_le(bytes(OWNER.bytes_le)), guid)
+        parser = UEFIParser(OWNER.bytes_le * 2)
+        self.assertIs(parser.get_guid(), parser.get_guid())
+
+    def test_parse_device_path(self):
+        path = device_path() + device_path_node(
+            3, 0x17, struct.pack("<IQ", 1, 0x1122334455667788)
+        )
+        (
+            acpi,
+            pci,
+            gpt_disk,
+            mbr_disk,
+            file_path,
+            unknown_path,
+            end,
+            nvme,
+        ) = parse_device_path(UEFIParser(path))
+        self.assertEqual(
+            acpi, AcpiDevicePath(DeviceType.acpi, 1, 0x0A0341D0, 0)
+        )
+        self.assertEqual(pci, PCIDevicePath(DeviceType.hardware, 1, 2, 0x1F))
+        self.assertIsInstance(gpt_disk, HarddriveDevicePath)
+        self.assertEqual(gpt_disk.partition_start, 2048)
+        self.assertEqual(gpt_disk.signature, DISK_GUID)
+        self.assertIsInstance(mbr_disk, HarddriveDevicePath)
+        self.assertEqual(mbr_disk.signature, 0xDEADBEEF)
+        self.assertIsInstance(file_path, FileDevicePath)
+        self.assertEqual(
+            file_path.path_name, utf16("\\EFI\\BOOT\\BOOTX64.EFI\x00")
+        )
+        self.assertEqual(
+            unknown_path,
+            UnknownDevicePath(DeviceType.messaging, 5, b"\x01\x02"),
+        )
+        self.assertIsInstance(end, EntireEndDevicePath)
+        self.assertEqual(
+            nvme,
+            MsgNVMENamespaceDevicePath(
+                DeviceType.messaging, 0x17, 1, 0x1122334455667788
+            ),
+        )
+
+    def test_parse_device_path_handler(self):
+        # handlers registered over the fixed layout paths are still called
+        class TestDevicePath(AcpiDevicePath):
+            pass
+
+        register_device_path_handler(DeviceType.acpi, 1, TestDevicePath)
+        self.addCleanup(
+            register_device_path_handler,
+            DeviceType.acpi,
+            AcpiDeviceSubType.acpi,
+            AcpiDevicePath,
+        )
+        (acpi, end) = parse_device_path(
+            UEFIParser(
+                device_path_node(2, 1, struct.pack("<II", 0x0A0341D0, 0))
+                + device_path_node(0x7F, 0xFF, b"")
+            )
+        )
+        self.assertIsInstance(acpi, TestDevicePath)
+        self.assertEqual(acpi.hid, 0x0A0341D0)
+
+    def test_UEFIParser_header_event(self):
+        parser = UEFIParser(synthetic_log())
+        header = parser.parse_header_event()
+        self.assertEqual(header.event_type, UEFIEventType.ev_no_action)
+        self.assertEqual(header.signature, b"Spec ID Event03\x00")
+        self.assertEqual(header.spec_version_major, 2)
+        self.assertEqual(header.uintn_size, 2)
+        self.assertEqual(header.digest_sizes, DIGEST_SIZES)
+        self.assertEqual(parser.uintn_size, 8)
+
+    def test_UEFIParser_log(self):
+        events = parse_log(synthetic_log())
+        self.assertEqual(len(events), 10)
+        for n, event in enumerate(events):
+            self.assertEqual(event.digests, digests(n))
+
+        sb, pk, db, order, boot, sep, app, handoff, gpt, unknown = events
+
+        self.assertIsInstance(sb, UEFIVariableDataEvent)
+        self.assertEqual(
+            sb.event_type, UEFIEventType.ev_efi_variable_driver_config
+        )
+        self.assertEqual(
+            sb.name, "SecureBoot-8be4df61-93ca-11d2-aa0d-00e098032b8c"
+        )
+        self.assertEqual(sb.variable_data, SecureBootVariable(enabled=True))
+
+        for var in (pk, db):
+            self.assertIsInstance(var.variable_data, SignaturesVariable)
+            x509, sha256 = var.variable_data.signature_lists
+            self.assertEqual(x509.signature_type, EFI_CERT_X509_GUID)
+            self.assertEqual(
+                x509.signatures, (X509SignatureData(OWNER, b"cert"),)
+            )
+            self.assertEqual(sha256.signature_type, EFI_CERT_SHA256_GUID)
+            self.assertEqual(
+                sha256.signatures,
+                tuple(
+                    UnknownSignatureData(OWNER, bytes([i]) * 32)
+                    for i in range(2)
+                ),
+            )
+        self.assertEqual(db.variable_name, EFI_IMAGE_SECURITY_DATABASE)
+
+        self.assertEqual(order.event_type, UEFIEventType.ev_efi_variable_boot)
+        self.assertIsInstance(order.variable_data, UEFIBootOrderVariable)
+        self.assertEqual(tuple(order.variable_data.boot_order), (1, 0))
+
+        self.assertIsInstance(boot.variable_data, UEFIBootVariable)
+        self.assertEqual(boot.variable_data.attributes, 1)
+        self.assertEqual(boot.variable_data.description, utf16("Linux\x00"))
+        self.assertEqual(boot.variable_data.optional_data, b"opt")
+        self.assertEqual(len(boot.variable_data.file_path_list), 7)
+
+        self.assertIsInstance(sep, UEFI_EV_SeparatorEvent)
+        self.assertEqual(sep.data, b"\x00" * 4)
+
+        self.assertIsInstance(app, UEFI_EF_EFI_BootServicesApplicationEvent)
+        self.assertEqual(app.image_location_in_memory, 0x1000)
+        self.assertEqual(app.image_length_in_memory, 0x2000)
+        self.assertEqual(app.device_path, boot.variable_data.file_path_list)
+
+        self.assertIsInstance(handoff, UEFI_EV_EFI_HandoffTablesEvent)
+        self.assertEqual(
+            handoff.table_entries,
+            ((EFI_GLOBAL_VARIABLE, 0x7000), (OWNER, 0x8000)),
+        )
+
+        self.assertIsInstance(gpt, UEFI_EV_EFI_GPTEvent)
+        self.assertEqual(gpt.partition_header.signature, 0x5452415020494645)
+        self.assertEqual(gpt.partition_header.disk_guid, DISK_GUID)
+        self.assertEqual(
+            [e.unique_partition_guid for e in gpt.partition_entries],
+            [UUID(int=1), UUID(int=2)],
+        )
+        self.assertEqual(
+            [e.partition_type_guid for e in gpt.partition_entries],
+            [ESP_GUID, ESP_GUID],
+        )
+        self.assertEqual(
+            [e.name for e in gpt.partition_entries], ["part0", "part1"]
+        )
+
+        self.assertIsInstance(unknown, UEFIUnknownEvent)
+        self.assertEqual(unknown.pcr, 9)
+        self.assertEqual(unknown.event_data, b"unknown")
+
+    def test_UEFIParser_iter_raw_events(self):
+        data = synthetic_log()
+        events = parse_log(data)
+        parser = UEFIParser(data)
+        parser.parse_header_event()
+        raw = list(parser.iter_raw_events())
+        self.assertFalse(parser.left)
+        self.assertEqual(len(raw), len(events))
+        for (pcr, event_type, digs, event_data), event in zip(raw, events):
+            self.assertEqual(pcr, event.pcr)
+            self.assertEqual(event_type, event.event_type)
+            self.assertEqual(digs, event.digests)
+            self.assertIsInstance(event_data, memoryview)
+        self.assertEqual(bytes(raw[-1][3]), b"unknown")
+        self.assertEqual(bytes(raw[5][3]), b"\x00" * 4)
+
+        parser = UEFIParser(data[:-1])
+        parser.parse_header_event()
+        with self.assertRaises(EOFError):
+            list(parser.iter_raw_events())
+
+    def test_UEFIParser_get_variable_header(self):
+        name = utf16("SecureBoot")
+        parser = UEFIParser(
+            variable(EFI_GLOBAL_VARIABLE, "SecureBoot", b"\x01")
+        )
+        guid, unlen, vdlen = parser.get_variable_header()
+        self.assertEqual(guid, EFI_GLOBAL_VARIABLE)
+        self.assertEqual(unlen, len(name) // 2)
+        self.assertEqual(vdlen, 1)
+        self.assertEqual(parser.left, len(name) + 1)
+
+    def test_UEFIParser_get_subparser_view(self):
+        parser = UEFIParser(b"abcdef")
+        parser.get_bytes(1)
+        subparser = parser.get_subparser_view(3)
+        self.assertEqual(parser.left, 2)
+        self.assertEqual(subparser.left, 3)
+        self.assertEqual(bytes(subparser.get_bytes(3)), b"bcd")
+        with self.assertRaises(EOFError):
+            subparser.get_bytes(1)
+        self.assertEqual(bytes(parser.get_bytes(2)), b"ef")
+        with self.assertRaises(EOFError):
+            parser.get_subparser_view(1)
+
+    def test_event_handler_registration(self):
+        self.restore_event_handlers()
+
+        class TestEvent(UEFIUnknownEvent):
+            pass
+
+        self.assertIs(
+            lookup_event_handler(UNKNOWN_EVENT_TYPE, 9), UEFIUnknownEvent
+        )
+        register_event_handler(UNKNOWN_EVENT_TYPE, TestEvent, 9)
+        # registering replaces the cached handler
+        self.assertIs(lookup_event_handler(UNKNOWN_EVENT_TYPE, 9), TestEvent)
+        self.assertIs(
+            lookup_event_handler(UNKNOWN_EVENT_TYPE, 8), UEFIUnknownEvent
+        )
+        (test,) = parse_log(
+            spec_id_event() + event(9, UNKNOWN_EVENT_TYPE, b"test", 0)
+        )
+        self.assertIsInstance(test, TestEvent)
+        self.assertEqual(test.event_data, b"test")
+
+    def test_SignatureList_empty(self):
+        data = signature_list(EFI_CERT_X509_GUID, [], 0)
+        parser = UEFIParser(data)
+        sl = SignatureList.parse(parser)
+        self.assertFalse(parser.left)
+        self.assertEqual(sl.signature_type, EFI_CERT_X509_GUID)
+        self.assertEqual(sl.signature_header, b"")
+        self.assertEqual(sl.signatures, ())
+
+        var = SignaturesVariable.parse(UEFIParser(data + data))
+        self.assertEqual(len(var.signature_lists), 2)
+        for sl in var.signature_lists:
+            self.assertEqual(sl.signatures, ())
+
+    def test_SignatureList_bad_size(self):
+        owner = UUID(int=1).bytes_le
+        data = signature_list(EFI_CERT_X509_GUID, [owner + b"cert"], 0)
+        with self.assertRaises(EOFError):
+            SignatureList.parse(UEFIParser(data))
+        data = signature_list(EFI_CERT_X509_GUID, [owner + b"cert"], 7)
+        with self.assertRaises(EOFError):
+            SignatureList.parse(UEFIParser(data))
+
+    def test_SignatureList_x509(self):
+        owner = UUID(int=1)
+        sigs = [owner.bytes_le + b"cert", owner.bytes_le + b"CERT"]
+        data = signature_list(EFI_CERT_X509_GUID, sigs, 20)
+        sl = SignatureList.parse(UEFIParser(data))
+        self.assertEqual(
+            sl.signatures,
+            (
+                X509SignatureData(owner, b"cert"),
+                X509SignatureData(owner, b"CERT"),
+            ),
+        )
+
+    def test_variable_handler_registration(self):
+        self.restore_variable_handlers()
+        vendor = UUID(int=0x5678)
+
+        class TestVariable(UEFIVariable):
+            pass
+
+        self.assertIs(
+            lookup_variable_handler(vendor, utf16("Test")),
+            UEFIUnknownVariable,
+        )
+        register_variable_handler(vendor, "Test", TestVariable)
+        # registering replaces the cached handler
+        self.assertIs(
+            lookup_variable_handler(vendor, utf16("Test")), TestVariable
+        )
+
+    def test_UEFIPartitionEntry_name(self):
+        names = ("EFI System", "xĀy", "A" * 36, "")
+        for name in names:
+            entry = UEFIPartitionEntry(
+                partition_type_guid=UUID(int=1),
+                unique_partition_guid=UUID(int=2),
+                starting_lba=34,
+                ending_lba=2048,
+                attributes=0,
+                partition_name=name.encode("utf-16-le").ljust(72, b"\x00"),
+            )
+            before = asdict(entry)
+            self.assertEqual(entry.name, name)
+            self.assertEqual(asdict(entry), before)
+
+    def test_SignaturesVariable_lists(self):
+        owner = UUID(int=1)
+        data = signature_list(
+            EFI_CERT_X509_GUID, [owner.bytes_le + b"cert"], 20, b"head"
+        ) + signature_list(
+            EFI_CERT_SHA256_GUID, [owner.bytes_le + b"\x01" * 32], 48
+        )
+        var = SignaturesVariable.parse(UEFIParser(data))
+        x509, sha256 = var.signature_lists
+        self.assertEqual(x509.signature_header, b"head")
+        self.assertEqual(
+            x509.signatures, (X509SignatureData(owner, b"cert"),)
+        )
+        self.assertEqual(sha256.signature_type, EFI_CERT_SHA256_GUID)
+        self.assertEqual(
+            sha256.signatures, (UnknownSignatureData(owner, b"\x01" * 32),)
+        )
+        with self.assertRaises(EOFError):
+            SignaturesVariable.parse(UEFIParser(data[:-1]))